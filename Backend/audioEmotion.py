@@ -1,14 +1,14 @@
 import torch
-import torchaudio
-import librosa
-import numpy as np
 from transformers import Wav2Vec2ForSequenceClassification, Wav2Vec2FeatureExtractor
+from src.audio_frontend import SpeechSegment
 """ how to use:
 from audioEmotion import get_emotion_and_volume
 
 emotion, volume = get_emotion_and_volume("harvard.wav")
 print("Emotion:", emotion)
 print("Avg Volume (dB):", round(volume, 2))
+
+A SpeechSegment the pipeline has already decoded can be passed instead of a path.
 """
 
 # Load model and processor once when the module is imported
@@ -22,23 +22,18 @@ _EMOTION_LABELS = {
     5: "neutral", 6: "sad", 7: "surprised", 8: "frustrated", 9: "excited", 10: "bored"
 }
 
-def get_emotion_and_volume(audio_path: str):
-    """Returns (emotion_label, average_volume_db) for a given audio file."""
+def get_emotion_and_volume(audio):
+    """Returns (emotion_label, average_volume_db) for an audio file path or a SpeechSegment."""
+    # Decoded and resampled to 16 kHz mono once; both measurements read the same samples.
+    # Duck-typed because the pipeline imports audio_frontend as a top-level module, not src.audio_frontend
+    segment = SpeechSegment.from_file(audio) if isinstance(audio, str) else audio
 
     # --- Emotion Detection ---
-    waveform, sample_rate = torchaudio.load(audio_path)
-    if sample_rate != 16000:
-        resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-        waveform = resampler(waveform)
-
-    inputs = _processor(waveform.squeeze().numpy(), sampling_rate=16000, return_tensors="pt")
+    inputs = _processor(segment.samples, sampling_rate=segment.sample_rate, return_tensors="pt")
     with torch.no_grad():
         logits = _model(**inputs).logits
     predicted_class_id = torch.argmax(logits).item()
     emotion = _EMOTION_LABELS.get(predicted_class_id, "unknown")
 
     # --- Volume Calculation ---
-    y, sr = librosa.load(audio_path, sr=None)
-    avg_volume_db = 20 * np.log10(np.mean(np.abs(y)))
-
-    return emotion, avg_volume_db
+    return emotion, segment.volume_db
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import tracing
+
+
+# Same checkpoints the two pipelines used: the sentiment-analysis default and the emotion classifier
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+MAX_TOKENS = 256
+
+TORCH = "torch"
+INT8 = "int8"
+ONNX = "onnx"
+
+
+class _Classifier:
+    def __init__(self, model_name: str, backend: str):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = None
+        if backend == ONNX:
+            try:
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+                self.model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            except ImportError:
+                print("⚠️ optimum[onnxruntime] not installed, falling back to int8 PyTorch")
+                backend = INT8
+        if self.model is None:
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+            if backend == INT8:
+                self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.id2label = self.model.config.id2label
+
+    def __call__(self, texts: List[str]) -> List[Tuple[str, float]]:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=MAX_TOKENS, return_tensors="pt")
+        with torch.inference_mode():
+            probs = torch.softmax(self.model(**inputs).logits, dim=-1)
+        scores, ids = probs.max(dim=-1)
+        return [(self.id2label[int(i)], float(s)) for i, s in zip(ids, scores)]
+
+
+class TextAffectAnalyzer:
+    """Sentiment and emotion for a batch of utterances in one call.
+
+    Each model tokenizes the whole batch once (the two checkpoints use different
+    vocabularies, so they can't share token ids) and the two forward passes run
+    side by side instead of back to back. `backend` is "torch", "int8" (dynamic
+    quantization of the Linear layers) or "onnx" (needs optimum[onnxruntime]).
+    """
+
+    def __init__(self, backend: str = TORCH, num_threads: int = 0):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.backend = backend
+        self.sentiment = _Classifier(SENTIMENT_MODEL, backend)
+        self.emotion = _Classifier(EMOTION_MODEL, backend)
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="affect")
+
+    def analyze_batch(self, texts: List[str]) -> List[Tuple[str, float, str, float]]:
+        """Return (sentiment, sentiment_score, emotion, emotion_score) for each text."""
+        if not texts:
+            return []
+        sentiment = self._pool.submit(tracing.bind(self._classify), "sentiment", self.sentiment, texts)
+        emotions = self._classify("emotion", self.emotion, texts)
+        return [(s, s_score, e, e_score) for (s, s_score), (e, e_score) in zip(sentiment.result(), emotions)]
+
+    @staticmethod
+    def _classify(stage: str, classifier: _Classifier, texts: List[str]):
+        with tracing.tracer.span(stage):
+            return classifier(texts)
+
+    def analyze(self, text: str) -> Tuple[str, float, str, float]:
+        return self.analyze_batch([text])[0]
@@ -1,16 +1,12 @@
 from flask import Flask, render_template, request, jsonify, Response
-import threading
-import time
 import os
-import queue
-import json
 
 
 # Import your existing modules
 import model_manager
-from live_audio_stream2 import calibrate_self_voice, listen_and_run
-from transcript_to_suggestions import process_transcript_segment
-from text_to_speech import speak
+from session_manager import sessions, DEFAULT_SESSION_ID
+from transcript_to_suggestions import suggestion_cache, suggestion_stats as _suggestion_stats
+import tracing
 
 # Create templates directory first
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -204,9 +200,9 @@ with open(os.path.join(templates_dir, 'index.html'), 'w') as f:
             }
         });
         
-        function addMessage(speaker, text) {
+        function addMessage(speaker, text, role) {
             const messageDiv = document.createElement('div');
-            messageDiv.className = `message ${speaker.toLowerCase()}`;
+            messageDiv.className = `message ${role || speaker.toLowerCase()}`;
             
             const speakerDiv = document.createElement('div');
             speakerDiv.className = 'speaker';
@@ -229,7 +225,7 @@ with open(os.path.join(templates_dir, 'index.html'), 'w') as f:
             const newMessages = JSON.parse(event.data);
             
             newMessages.forEach(msg => {
-                addMessage(msg.speaker, msg.text);
+                addMessage(msg.speaker, msg.text, msg.role);
             });
         };
         
@@ -289,173 +285,133 @@ with open(os.path.join(templates_dir, 'index.html'), 'w') as f:
 # Create Flask app after template is created
 app = Flask(__name__, template_folder=templates_dir)
 
-# Global variables
-conversation_history = []
-is_listening = False
-listening_thread = None
-calibration_step = 0
-calibration_updates = queue.Queue()
+def _session(create: bool = True):
+    """Session named by ?session=<id> (or a JSON "session" field); the page uses the default one."""
+    body = request.get_json(silent=True) or {}
+    session_id = request.args.get('session') or body.get('session') or DEFAULT_SESSION_ID
+    return sessions.get_or_create(session_id) if create else sessions.get(session_id)
+
+def _parse_arg(name, convert, default):
+    """Query argument `name` converted with `convert`, `default` when absent, or None when malformed."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return convert(value)
+    except ValueError:
+        return None
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    return jsonify(sessions.list())
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    session = sessions.create()
+    return jsonify({"status": "success", "session": session.id})
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    if not sessions.close(session_id):
+        return jsonify({"status": "error", "message": "No such session"}), 404
+    return jsonify({"status": "success"})
+
 @app.route('/start_listening', methods=['POST'])
 def start_listening():
-    global is_listening, listening_thread, calibration_step
-    
-    if is_listening:
+    session = _session()
+
+    if session.is_listening:
         return jsonify({"status": "error", "message": "Already listening"})
-    
-    # Reset calibration step
-    calibration_step = 0
-    calibration_updates.put({"step": calibration_step, "message": "Press Enter and speak when prompted for calibration."})
-    
-    # Start calibration and listening in a separate thread
-    listening_thread = threading.Thread(target=calibrate_and_listen)
-    listening_thread.daemon = True
-    listening_thread.start()
-    
-    return jsonify({"status": "success", "message": "Starting calibration and listening"})
 
-def calibrate_and_listen():
-    global is_listening, calibration_step
-    
+    session.publish_calibration(0, "Press Enter and speak when prompted for calibration.")
+
+    # Calibration and listening run in a separate thread
     try:
-        # Replace input() calls in calibrate_self_voice
-        original_input = __builtins__.input
-        
-        def custom_input(prompt):
-            global calibration_step
-            calibration_step += 1
-            
-            if "sample 1" in prompt:
-                calibration_updates.put({"step": 1, "message": "Speak sample 1/3 now..."})
-                time.sleep(1)  # Give UI time to update
-                return ""
-            elif "sample 2" in prompt:
-                calibration_updates.put({"step": 2, "message": "Speak sample 2/3 now..."})
-                time.sleep(1)
-                return ""
-            elif "sample 3" in prompt:
-                calibration_updates.put({"step": 3, "message": "Speak sample 3/3 now..."})
-                time.sleep(1)
-                return ""
-            else:
-                return original_input(prompt)
-        
-        __builtins__.input = custom_input
-        
-        # Run calibration
-        try:
-            calibrate_self_voice()
-            calibration_updates.put({"step": "completed", "message": "Calibration complete. Now listening for conversations."})
-        finally:
-            # Restore original input function
-            __builtins__.input = original_input
-        
-        # Start listening
-        is_listening = True
-        listen_and_run()
-    except Exception as e:
-        print(f"Error in calibrate_and_listen: {e}")
-    finally:
-        is_listening = False
+        sessions.start_local_listening(session)
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)})
+
+    return jsonify({"status": "success", "message": "Starting calibration and listening"})
 
 @app.route('/stop_listening', methods=['POST'])
 def stop_listening():
-    global is_listening
-    
-    if not is_listening:
+    session = _session(create=False)
+
+    if session is None or not session.is_listening:
         return jsonify({"status": "error", "message": "Not currently listening"})
-    
-    is_listening = False
-    conversation_history.append({
-        "speaker": "System",
-        "text": "Listening stopped.",
-        "timestamp": time.time()
-    })
-    
+
+    session.stop()
+    session.record("System", "Listening stopped.")
+
     return jsonify({"status": "success", "message": "Stopped listening"})
 
 @app.route('/get_conversation_history')
 def get_conversation_history():
-    return jsonify(conversation_history)
+    return jsonify(_session().history)
+
+@app.route('/capture_stats')
+def capture_stats():
+    return jsonify(_session().pipeline.stats())
+
+@app.route('/scheduler_stats')
+def scheduler_stats():
+    return jsonify(model_manager.scheduler.stats())
+
+@app.route('/ready')
+def ready():
+    # 503 until every model has loaded and run its warm-up inference
+    report = model_manager.readiness_report()
+    return jsonify(report), (200 if report["ready"] else 503)
+
+@app.route('/metrics')
+def metrics():
+    return Response(tracing.metrics_text(model_manager.scheduler.stats()), mimetype='text/plain; version=0.0.4')
+
+@app.route('/traces')
+def traces():
+    # Recent spans, optionally for one session and/or utterance
+    limit = _parse_arg('limit', int, 200)
+    if limit is None or limit < 1:
+        return jsonify({"status": "error", "message": "limit must be a positive integer"}), 400
+    return jsonify(tracing.tracer.recent(request.args.get('session'), request.args.get('utterance'), limit))
+
+@app.route('/debug/profile')
+def profile():
+    if not tracing.PROFILER_ENABLED:
+        return jsonify({"status": "error", "message": "Set PROFILER_ENABLED=1 to allow profiling"}), 404
+    seconds, hz = _parse_arg('seconds', float, 5), _parse_arg('hz', float, 100)
+    if seconds is None or hz is None or seconds <= 0 or hz <= 0:
+        return jsonify({"status": "error", "message": "seconds and hz must be positive numbers"}), 400
+    stacks = tracing.sample_stacks(seconds, hz)
+    return Response(stacks, mimetype='text/plain')
+
+@app.route('/suggestion_cache_stats')
+def suggestion_cache_stats():
+    return jsonify(suggestion_cache.stats())
+
+@app.route('/suggestion_stats')
+def suggestion_stats():
+    return jsonify(_suggestion_stats())
 
 @app.route('/stream_updates')
 def stream_updates():
-    def generate():
-        last_id = 0
-        while True:
-            if len(conversation_history) > last_id:
-                data = json.dumps(conversation_history[last_id:])
-                last_id = len(conversation_history)
-                yield f"data: {data}\n\n"
-            time.sleep(0.5)
-    
-    return Response(generate(), mimetype='text/event-stream')
+    # A fresh page gets the buffered history; a reconnect resumes after the last event it saw
+    events = _session().events.subscribe(request.headers.get('Last-Event-ID'), replay=True)
+    return Response(events, mimetype='text/event-stream')
 
 @app.route('/calibration_updates')
 def calibration_updates_stream():
-    def generate():
-        while True:
-            try:
-                data = calibration_updates.get(timeout=1)
-                yield f"data: {json.dumps(data)}\n\n"
-            except queue.Empty:
-                time.sleep(0.5)
-                continue
-    
-    return Response(generate(), mimetype='text/event-stream')
-
-# Override the original functions to capture output
-def _patched_process_transcript_segment(ctx, new_text):
-    try:
-        # Add to conversation history first
-        conversation_history.append({
-            "speaker": "Other",
-            "text": new_text,
-            "timestamp": time.time()
-        })
-        
-        # Then call the original function to generate a response
-        process_transcript_segment(ctx, new_text)
-    except Exception as e:
-        print(f"Error in patched process_transcript_segment: {e}")
-        conversation_history.append({
-            "speaker": "System",
-            "text": f"Error processing transcript: {e}",
-            "timestamp": time.time()
-        })
-
-# Override speak function to capture the response
-def _patched_speak(text, speed=1.3):
-    try:
-        # Add AI response to conversation history
-        conversation_history.append({
-            "speaker": "AI",
-            "text": text,
-            "timestamp": time.time()
-        })
-        
-        # Call the original speak function
-        return speak(text, speed)
-    except Exception as e:
-        print(f"Error in patched speak: {e}")
-        conversation_history.append({
-            "speaker": "System",
-            "text": f"Error generating speech: {e}",
-            "timestamp": time.time()
-        })
-        return None
-
-# Apply the patches
-import transcript_to_suggestions
-import text_to_speech
-transcript_to_suggestions.process_transcript_segment = _patched_process_transcript_segment
-text_to_speech.speak = _patched_speak
+    events = _session().calibration_events.subscribe(request.headers.get('Last-Event-ID'), replay=False)
+    return Response(events, mimetype='text/event-stream')
 
 if __name__ == '__main__':
     print("Flask app starting on http://127.0.0.1:5000")
     print("Templates directory:", templates_dir)
+    # Bind right away and load models behind it; with the debug reloader only the child serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        model_manager.start_background_warm_up()
     app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+TORCH = "torch"
+INT8 = "int8"
+CTRANSLATE2 = "ctranslate2"
+
+# Greedy decoding: a single temperature disables Whisper's fallback re-decodes at higher temperatures
+GREEDY_OPTIONS = {
+    "temperature": 0.0,
+    "beam_size": None,
+    "best_of": None,
+    "fp16": False,
+}
+
+
+class WhisperBackend:
+    """Stock openai-whisper on CPU. `transcribe` takes a float32 16 kHz array and whisper's keyword options."""
+
+    name = TORCH
+
+    def __init__(self, model_name: str, num_threads: int = 0):
+        import torch
+        import whisper
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_name = model_name
+        self.model = whisper.load_model(model_name, device="cpu")
+
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        return self.model.transcribe(audio, **{**GREEDY_OPTIONS, **options})
+
+
+class Int8WhisperBackend(WhisperBackend):
+    """Whisper with its Linear layers dynamically quantized to int8."""
+
+    name = INT8
+
+    def __init__(self, model_name: str, num_threads: int = 0):
+        super().__init__(model_name, num_threads)
+        import torch
+        import whisper
+        # whisper's Linear subclass only casts weights to the input dtype, a no-op in
+        # float32 on CPU; downgrade it so quantize_dynamic recognizes the layers
+        for module in self.model.modules():
+            if isinstance(module, whisper.model.Linear):
+                module.__class__ = torch.nn.Linear
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class CTranslate2WhisperBackend:
+    """faster-whisper (CTranslate2, int8 on CPU), returning whisper's result layout so callers don't change."""
+
+    name = CTRANSLATE2
+
+    def __init__(self, model_name: str, num_threads: int = 0):
+        from faster_whisper import WhisperModel
+        self.model_name = model_name
+        self.model = WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=num_threads)
+
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        options = {**GREEDY_OPTIONS, **options}
+        options.pop("fp16", None)
+        options["beam_size"] = options.get("beam_size") or 1
+        options["best_of"] = options.get("best_of") or 1
+        segments, info = self.model.transcribe(np.asarray(audio, dtype=np.float32), **options)
+        result_segments = []
+        for s in segments:
+            result_segments.append({
+                "start": s.start,
+                "end": s.end,
+                "text": s.text,
+                "words": [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in (s.words or [])
+                ],
+            })
+        return {
+            "text": "".join(s["text"] for s in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+
+
+BACKENDS = {
+    TORCH: WhisperBackend,
+    INT8: Int8WhisperBackend,
+    CTRANSLATE2: CTranslate2WhisperBackend,
+}
+
+
+def load_backend(backend: str, model_name: str, num_threads: int = 0):
+    """Load `model_name` with the given backend ("torch", "int8" or "ctranslate2")."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend: {backend}")
+    if backend == CTRANSLATE2:
+        try:
+            return CTranslate2WhisperBackend(model_name, num_threads)
+        except ImportError:
+            print("⚠️ faster-whisper not installed, falling back to int8 PyTorch")
+            backend = INT8
+    return BACKENDS[backend](model_name, num_threads)
@@ -0,0 +1,186 @@
+import bisect
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+PCM16 = "pcm16"  # 16-bit little-endian mono
+MULAW = "mulaw"  # G.711 mu-law, half the bandwidth of PCM16
+ENCODINGS = (PCM16, MULAW)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+MERGE = "merge"
+
+WRITE_LOG_SIZE = 2048  # recent (end position, time) pairs kept for mapping positions to wall time
+
+
+def _mulaw_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = (((u & 0x0F) << 3) + 0x84) << exponent
+    return np.where(u & 0x80, 0x84 - magnitude, magnitude - 0x84).astype(np.int16)
+
+
+_MULAW_TO_PCM16 = _mulaw_table()
+
+
+def decode_frames(data: bytes, encoding: str = PCM16) -> np.ndarray:
+    """Turn network audio bytes into the int16 samples the ring buffer holds."""
+    if encoding == PCM16:
+        return np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2")
+    if encoding == MULAW:
+        return _MULAW_TO_PCM16[np.frombuffer(data, dtype=np.uint8)]
+    raise ValueError(f"Unsupported audio encoding: {encoding}")
+
+
+class AudioRingBuffer:
+    """Preallocated int16 ring buffer written by the PortAudio callback.
+
+    Positions are absolute sample counts since the stream started, so readers can
+    hold on to a segment start without caring where the write head has wrapped to.
+    A write claims its slots before copying into them and publishes them after,
+    so a reader copying out old samples at the same time sees the lap.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._write_pos = 0
+        self._claimed_pos = 0  # end of the slots being written; runs ahead of _write_pos during a copy
+        self._cond = threading.Condition()
+        self._write_log = deque(maxlen=WRITE_LOG_SIZE)
+
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    def write(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        n = len(samples)
+        with self._cond:
+            if n > self.capacity:
+                samples = samples[-self.capacity:]
+                self._write_pos += n - self.capacity
+                n = self.capacity
+            # Samples older than this are about to be overwritten
+            self._claimed_pos = self._write_pos + n
+
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        self._buf[:n - first] = samples[first:]
+
+        with self._cond:
+            self._write_pos += n
+            self._write_log.append((self._write_pos, time.perf_counter()))
+            self._cond.notify_all()
+
+    def time_of(self, pos: int):
+        """perf_counter() time at which sample `pos` arrived, or None if it is too old to know."""
+        with self._cond:
+            log = list(self._write_log)
+        i = bisect.bisect_right([end for end, _ in log], pos)
+        return log[i][1] if i < len(log) else None
+
+    def oldest_pos(self) -> int:
+        """First absolute position that has not been overwritten, or claimed by a write in progress."""
+        return max(0, self._claimed_pos - self.capacity)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy samples [start, end) out of the ring in at most two slices."""
+        if start < self.oldest_pos() or end > self._write_pos or start > end:
+            raise IndexError(f"range [{start}, {end}) is not in the buffer")
+        n = end - start
+        i = start % self.capacity
+        if i + n <= self.capacity:
+            out = self._buf[i:i + n].copy()
+        else:
+            out = np.concatenate((self._buf[i:], self._buf[:n - (self.capacity - i)]))
+        # The callback may have lapped us while we were copying
+        if start < self.oldest_pos():
+            raise IndexError(f"range [{start}, {end}) was overwritten during read")
+        return out
+
+    def wait_for(self, pos: int, timeout: float = None) -> bool:
+        """Block until at least `pos` samples have been written."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._write_pos >= pos, timeout=timeout)
+
+
+class SegmentQueue:
+    """Bounded hand-off between the capture loop and the inference worker.
+
+    When full, `policy` decides what happens to a new segment:
+    - "merge": append it to the newest queued segment so no speech is lost
+    - "drop_oldest": discard the stalest queued segment
+    - "drop_newest": discard the incoming segment
+
+    `merge_fn(older, newer)` combines two queued items; by default they are
+    concatenated as arrays.
+    """
+
+    def __init__(self, maxsize: int = 4, policy: str = MERGE, merge_fn=None):
+        if policy not in (MERGE, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._merge = merge_fn or (lambda older, newer: np.concatenate((older, newer)))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.merged = 0
+        self.max_depth = 0
+
+    def put(self, segment):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.policy == MERGE:
+                    self._items[-1] = self._merge(self._items[-1], segment)
+                    self.merged += 1
+                    return
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                self._items.popleft()
+                self.dropped += 1
+
+            self._items.append(segment)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+
+    def get(self, timeout: float = None):
+        """Return the next segment, or None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                return None
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def depth(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "policy": self.policy,
+        }
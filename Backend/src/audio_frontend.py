@@ -0,0 +1,92 @@
+from functools import cached_property
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+TRIM_THRESHOLD_DB = 35.0  # edge frames this far below the loudest frame are trimmed
+TRIM_MARGIN_MS = 100
+SILENCE_DB = -100.0
+
+
+def load_wav(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Read a WAV file as mono float32 in [-1, 1] at `sample_rate`."""
+    from scipy.io import wavfile
+    from scipy.signal import resample_poly
+
+    rate, data = wavfile.read(path)
+    if data.dtype.kind == "i":
+        data = data.astype(np.float32) / np.iinfo(data.dtype).max
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if rate != sample_rate:
+        g = np.gcd(rate, sample_rate)
+        data = resample_poly(data, sample_rate // g, rate // g)
+    return data.astype(np.float32)
+
+
+class SpeechSegment:
+    """One utterance, decoded to mono float32 at 16 kHz exactly once.
+
+    Derived features (frame RMS, trim bounds, volume, the speaker encoder's
+    normalized input) are computed the first time something asks for them and
+    cached, so the speaker gate, Whisper and the audio-emotion model all read
+    the same arrays instead of each reloading and re-normalizing the audio.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_pcm16(cls, pcm16: np.ndarray, sample_rate: int = SAMPLE_RATE) -> "SpeechSegment":
+        return cls(np.squeeze(pcm16).astype(np.float32) / 32768.0, sample_rate)
+
+    @classmethod
+    def from_file(cls, path: str, sample_rate: int = SAMPLE_RATE) -> "SpeechSegment":
+        return cls(load_wav(path, sample_rate), sample_rate)
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def frame_len(self) -> int:
+        return self.sample_rate * FRAME_MS // 1000
+
+    @cached_property
+    def frame_rms(self) -> np.ndarray:
+        n = len(self.samples) // self.frame_len
+        frames = self.samples[:n * self.frame_len].reshape(n, self.frame_len)
+        return np.sqrt(np.mean(np.square(frames), axis=1))
+
+    @cached_property
+    def frame_db(self) -> np.ndarray:
+        return 20 * np.log10(np.maximum(self.frame_rms, 10 ** (SILENCE_DB / 20)))
+
+    @cached_property
+    def trim_bounds(self):
+        """(start, end) sample range without the quiet frames at either edge."""
+        if not len(self.frame_db):
+            return 0, len(self.samples)
+        loud = np.flatnonzero(self.frame_db >= self.frame_db.max() - TRIM_THRESHOLD_DB)
+        margin = self.sample_rate * TRIM_MARGIN_MS // 1000
+        start = max(0, int(loud[0]) * self.frame_len - margin)
+        end = min(len(self.samples), (int(loud[-1]) + 1) * self.frame_len + margin)
+        return start, end
+
+    @property
+    def trimmed(self) -> np.ndarray:
+        start, end = self.trim_bounds
+        return self.samples[start:end]
+
+    @cached_property
+    def volume_db(self) -> float:
+        """Mean absolute amplitude in dB, the loudness figure audioEmotion reports."""
+        return float(20 * np.log10(max(float(np.mean(np.abs(self.samples))), 10 ** (SILENCE_DB / 20))))
+
+    @cached_property
+    def encoder_input(self) -> np.ndarray:
+        """Resemblyzer's volume-normalized, silence-trimmed waveform."""
+        from resemblyzer import preprocess_wav
+        return preprocess_wav(self.samples, source_sr=self.sample_rate)
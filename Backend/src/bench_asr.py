@@ -0,0 +1,98 @@
+"""Word error rate and real-time factor of each ASR backend on data/harvard.wav.
+
+    python bench_asr.py                               # every backend, tiny.en, 3 runs each
+    python bench_asr.py --backends torch int8 --threads 4 --model base.en
+    python bench_asr.py --record asr.jsonl            # append results to track them over time
+
+RTF is decode time divided by audio duration (below 1.0 is faster than real time).
+WER is word-level edit distance against the Harvard sentences read in the clip.
+"""
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+from asr_backends import BACKENDS, load_backend
+from audio_frontend import load_wav
+
+
+SAMPLE_RATE = 16000
+DEFAULT_AUDIO = os.path.join(os.path.dirname(__file__), "..", "..", "data", "harvard.wav")
+HARVARD_REFERENCE = (
+    "The stale smell of old beer lingers. It takes heat to bring out the odor. "
+    "A cold dip restores health and zest. A salt pickle tastes fine with ham. "
+    "Tacos al pastor are my favorite. A zestful food is the hot cross bun."
+)
+
+
+def _words(text: str):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _words(reference), _words(hypothesis)
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / max(1, len(ref))
+
+
+def bench(backend: str, model_name: str, audio: np.ndarray, runs: int, threads: int) -> dict:
+    start = time.perf_counter()
+    model = load_backend(backend, model_name, threads)
+    load_s = time.perf_counter() - start
+    model.transcribe(audio[:SAMPLE_RATE])  # first call pays lazy init
+
+    times = []
+    text = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = model.transcribe(audio)["text"]
+        times.append(time.perf_counter() - start)
+    duration = len(audio) / SAMPLE_RATE
+    return {
+        "backend": backend,
+        "loaded_as": model.name,
+        "model": model_name,
+        "threads": threads,
+        "load_s": round(load_s, 3),
+        "decode_s": round(float(np.median(times)), 3),
+        "rtf": round(float(np.median(times)) / duration, 4),
+        "wer": round(word_error_rate(HARVARD_REFERENCE, text), 4),
+        "text": text.strip(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", default=DEFAULT_AUDIO)
+    parser.add_argument("--model", default="tiny.en")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--record", help="append JSON results to this file")
+    args = parser.parse_args()
+
+    audio = load_wav(args.audio, SAMPLE_RATE)
+    results = [bench(b, args.model, audio, args.runs, args.threads) for b in args.backends]
+
+    baseline = next((r for r in results if r["backend"] == "torch"), results[0])
+    print(f"{'backend':<12} {'loaded as':<12} {'RTF':>7} {'speedup':>8} {'WER':>7}")
+    for r in results:
+        r["speedup"] = round(baseline["rtf"] / r["rtf"], 2) if r["rtf"] else None
+        print(f"{r['backend']:<12} {r['loaded_as']:<12} {r['rtf']:>7.3f} {r['speedup']:>7}x {r['wer']:>7.3f}")
+    for r in results:
+        print(f"\n[{r['backend']}] {r['text']}")
+
+    if args.record:
+        with open(args.record, "a") as f:
+            for r in results:
+                f.write(json.dumps({"timestamp": time.time(), **r}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Cold-start benchmark: time to import the server modules and time until every model is warm.
+
+Run each mode in a fresh process so nothing is already imported or loaded:
+
+    python bench_startup.py                  # parallel warm-up
+    python bench_startup.py --sequential     # one model after another, for comparison
+    python bench_startup.py --record startup.jsonl   # append the result to track it across changes
+"""
+import argparse
+import json
+import subprocess
+import time
+
+start = time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sequential", action="store_true", help="warm models one at a time")
+    parser.add_argument("--record", help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    import model_manager
+    import session_manager  # noqa: F401  (pulls in the pipeline and suggestion modules like app.py does)
+    import_s = time.perf_counter() - start
+
+    report = model_manager.warm_up(parallel=not args.sequential)
+    ready_s = time.perf_counter() - start
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    result = {
+        "timestamp": time.time(),
+        "commit": commit,
+        "mode": "sequential" if args.sequential else "parallel",
+        "import_s": round(import_s, 3),
+        "time_to_ready_s": round(ready_s, 3),
+        **report,
+    }
+    print(json.dumps(result, indent=2))
+    if args.record:
+        with open(args.record, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
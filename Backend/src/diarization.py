@@ -0,0 +1,63 @@
+import threading
+import numpy as np
+
+
+EMBEDDING_DIM = 256          # Resemblyzer output size
+MAX_SPEAKERS = 8
+NEW_SPEAKER_THRESHOLD = 0.70  # below this cosine similarity to every centroid, open a new speaker
+
+
+class OnlineDiarizer:
+    """Assigns session-stable speaker labels to segment embeddings as they arrive.
+
+    Keeps one running-mean centroid per speaker in a fixed (MAX_SPEAKERS, dim)
+    matrix, so each assignment is a single small matrix-vector product no matter
+    how long the session has been running.
+    """
+
+    def __init__(self, max_speakers: int = MAX_SPEAKERS, threshold: float = NEW_SPEAKER_THRESHOLD,
+                 dim: int = EMBEDDING_DIM):
+        self.max_speakers = max_speakers
+        self.threshold = threshold
+        self._centroids = np.zeros((max_speakers, dim), dtype=np.float32)
+        self._sums = np.zeros((max_speakers, dim), dtype=np.float32)
+        self._counts = np.zeros(max_speakers, dtype=np.int64)
+        self._n = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def label(index: int) -> str:
+        return f"Speaker {index + 1}"
+
+    @property
+    def num_speakers(self) -> int:
+        return self._n
+
+    def assign(self, embedding: np.ndarray) -> str:
+        """Return the speaker label for `embedding` and fold it into that speaker's centroid."""
+        emb = np.asarray(embedding, dtype=np.float32)
+        emb = emb / (np.linalg.norm(emb) + 1e-8)
+
+        with self._lock:
+            if self._n:
+                sims = self._centroids[:self._n] @ emb
+                best = int(np.argmax(sims))
+                if sims[best] < self.threshold and self._n < self.max_speakers:
+                    best = self._n
+                    self._n += 1
+            else:
+                best = 0
+                self._n = 1
+
+            self._sums[best] += emb
+            self._counts[best] += 1
+            centroid = self._sums[best]
+            self._centroids[best] = centroid / (np.linalg.norm(centroid) + 1e-8)
+            return self.label(best)
+
+    def reset(self):
+        with self._lock:
+            self._centroids[:] = 0
+            self._sums[:] = 0
+            self._counts[:] = 0
+            self._n = 0
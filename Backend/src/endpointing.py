@@ -0,0 +1,161 @@
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+PRE_ROLL_MS = 200            # audio kept before the first speech frame, so onsets aren't clipped
+TRAIL_PAD_MS = 150           # audio kept after the last speech frame; the rest of the hangover is dropped
+MIN_HANGOVER_MS = 500
+MAX_HANGOVER_MS = 1500
+INITIAL_HANGOVER_MS = 800    # until we've heard how this speaker pauses
+PAUSE_FACTOR = 2.5           # a turn ends after silence this many times a typical mid-turn pause
+MIN_PAUSE_MS = 90            # shorter gaps are VAD flicker, not pauses
+PAUSE_ALPHA = 0.2
+NOISY_FLOOR_DBFS = -45.0     # above this the VAD flickers more, so wait a little longer
+NOISE_HANGOVER_MS = 200
+ENERGY_GATE_DB = 6.0         # frames within this of the noise floor skip the WebRTC VAD
+ABS_SILENCE_DBFS = -60.0     # frames below this are silence whatever the floor
+MAX_FLOOR_DBFS = -30.0       # never let the floor rise far enough to gate out speech
+NOISE_FLOOR_ALPHA = 0.05
+MAX_SEGMENT_SECONDS = 15.0
+MIN_SPLIT_PAUSE_MS = 120
+
+START = "start"
+END = "end"
+SPLIT = "split"
+
+
+def frame_dbfs(frame: np.ndarray) -> float:
+    """Level of an int16 frame in dB relative to full scale."""
+    rms = np.sqrt(np.mean(np.square(frame, dtype=np.float32)))
+    return float(20 * np.log10(max(float(rms), 1.0) / 32768.0))
+
+
+class Endpointer:
+    """Turns a stream of fixed-size int16 frames into speech segments.
+
+    - A NumPy energy pre-gate treats frames near the running noise floor as
+      silence without calling the WebRTC VAD.
+    - The hangover (silence needed to end a turn) follows this speaker's
+      typical mid-turn pause and grows in noisy rooms.
+    - Segments start PRE_ROLL_MS before the first speech frame and end
+      TRAIL_PAD_MS after the last one, not at the end of the hangover.
+    - A turn longer than `max_segment_seconds` is split at its longest recent
+      pause, or hard at the cap if there is none.
+
+    `push(frame, pos)` returns events:
+    - (START, start)
+    - (END, start, end, speech_end)
+    - (SPLIT, start, end, speech_end), after which the turn carries on from `end`
+    Positions are absolute sample counts, like the ring buffer's.
+    """
+
+    def __init__(self, vad, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS,
+                 max_segment_seconds: float = MAX_SEGMENT_SECONDS):
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.max_segment = int(max_segment_seconds * sample_rate)
+        self.noise_floor_db = None
+        self.pause_ms = None
+        self.vad_calls = 0
+        self.gated_frames = 0
+        self.splits = 0
+        self.reset()
+
+    def reset(self, floor_pos: int = 0):
+        """Forget any turn in progress; no segment will start before `floor_pos`."""
+        self.in_speech = False
+        self.start = None
+        self.last_speech_end = None
+        self.silence_start = None
+        self.pauses = []
+        self._floor_pos = floor_pos
+
+    def _samples(self, ms: float) -> int:
+        return int(ms * self.sample_rate / 1000)
+
+    def _ms(self, samples: int) -> float:
+        return samples * 1000 / self.sample_rate
+
+    @property
+    def hangover_ms(self) -> float:
+        hangover = INITIAL_HANGOVER_MS if self.pause_ms is None else PAUSE_FACTOR * self.pause_ms
+        if self.noise_floor_db is not None and self.noise_floor_db > NOISY_FLOOR_DBFS:
+            hangover += NOISE_HANGOVER_MS
+        return min(MAX_HANGOVER_MS, max(MIN_HANGOVER_MS, hangover))
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        db = frame_dbfs(frame)
+        if db < ABS_SILENCE_DBFS or (self.noise_floor_db is not None and db < self.noise_floor_db + ENERGY_GATE_DB):
+            self.gated_frames += 1
+            speech = False
+        else:
+            self.vad_calls += 1
+            speech = self.vad.is_speech(frame.tobytes(), self.sample_rate)
+        if not speech:
+            floor = db if self.noise_floor_db is None else (1 - NOISE_FLOOR_ALPHA) * self.noise_floor_db + NOISE_FLOOR_ALPHA * db
+            self.noise_floor_db = min(floor, MAX_FLOOR_DBFS)
+        return speech
+
+    def _observe_pause(self, ms: float):
+        if ms < MIN_PAUSE_MS:
+            return
+        self.pause_ms = ms if self.pause_ms is None else (1 - PAUSE_ALPHA) * self.pause_ms + PAUSE_ALPHA * ms
+
+    def _split_point(self, end: int) -> int:
+        """Middle of the longest pause in the back half of the turn, or `end` if there is none."""
+        candidates = list(self.pauses)
+        if self.silence_start is not None:
+            candidates.append((self.silence_start, end))
+        halfway = self.start + (end - self.start) // 2
+        candidates = [(s, e) for s, e in candidates
+                      if s >= halfway and self._ms(e - s) >= MIN_SPLIT_PAUSE_MS]
+        if not candidates:
+            return end
+        s, e = max(candidates, key=lambda p: p[1] - p[0])
+        return (s + e) // 2
+
+    def push(self, frame: np.ndarray, pos: int) -> list:
+        end = pos + len(frame)
+        events = []
+        if self.is_speech(frame):
+            if not self.in_speech:
+                self.in_speech = True
+                self.start = max(self._floor_pos, pos - self._samples(PRE_ROLL_MS))
+                self.pauses = []
+                events.append((START, self.start))
+            elif self.silence_start is not None:
+                # A mid-turn pause just ended
+                self.pauses.append((self.silence_start, pos))
+                self._observe_pause(self._ms(pos - self.silence_start))
+            self.silence_start = None
+            self.last_speech_end = end
+        elif self.in_speech:
+            if self.silence_start is None:
+                self.silence_start = pos
+            if self._ms(end - self.silence_start) >= self.hangover_ms:
+                segment_end = min(end, self.last_speech_end + self._samples(TRAIL_PAD_MS))
+                events.append((END, self.start, segment_end, self.last_speech_end))
+                self.reset(floor_pos=segment_end)
+                return events
+
+        if self.in_speech and end - self.start >= self.max_segment:
+            split = self._split_point(end)
+            events.append((SPLIT, self.start, split, min(split, self.last_speech_end)))
+            self.splits += 1
+            self.start = self._floor_pos = split
+            self.pauses = [p for p in self.pauses if p[0] >= split]
+            if self.silence_start is not None and self.silence_start < split:
+                self.silence_start = split
+        return events
+
+    def stats(self) -> dict:
+        return {
+            "vad_calls": self.vad_calls,
+            "energy_gated_frames": self.gated_frames,
+            "segment_splits": self.splits,
+            "hangover_ms": round(self.hangover_ms),
+            "noise_floor_dbfs": None if self.noise_floor_db is None else round(self.noise_floor_db, 1),
+        }
@@ -0,0 +1,109 @@
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Optional
+
+
+REPLAY_SIZE = 256
+HEARTBEAT_SECONDS = 15
+
+
+class EventBus:
+    """Fan-out publish/subscribe for Server-Sent Events.
+
+    Each event is serialized into its SSE frame once at publish time and kept
+    in a bounded replay ring. Subscribers block on a condition variable instead
+    of polling, and resume after a reconnect from the browser's Last-Event-ID.
+    """
+
+    def __init__(self, replay_size: int = REPLAY_SIZE):
+        self._ring = deque(maxlen=replay_size)  # (event_id, data, frame)
+        self._last_id = 0
+        self._cond = threading.Condition()
+        self._listeners = []
+        self.subscribers = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, data, event: Optional[str] = None) -> int:
+        with self._cond:
+            self._last_id += 1
+            event_id = self._last_id
+            frame = f"id: {event_id}\n"
+            if event:
+                frame += f"event: {event}\n"
+            frame += f"data: {json.dumps(data)}\n\n"
+            self._ring.append((event_id, data, frame))
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback((event_id, data, frame))
+            except Exception as e:
+                print(f"⚠️ Event listener failed: {e}")
+        return event_id
+
+    def add_listener(self, callback):
+        """Push-style subscription: `callback((event_id, data, frame))` runs on the publisher's thread.
+
+        For asyncio consumers, which should not park a thread per client on `listen`.
+        """
+        with self._cond:
+            self._listeners.append(callback)
+            self.subscribers += 1
+
+    def remove_listener(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+                self.subscribers -= 1
+
+    def _events_after(self, cursor: int):
+        if not self._ring or cursor >= self._last_id:
+            return []
+        first_id = self._ring[0][0]
+        return list(itertools.islice(self._ring, max(0, cursor + 1 - first_id), None))
+
+    def listen(self, last_event_id: Optional[str] = None, replay: bool = True,
+               heartbeat: float = HEARTBEAT_SECONDS):
+        """Generator of (event_id, data, frame) for one subscriber, or None after `heartbeat` idle seconds.
+
+        Resumes after `last_event_id` when given; otherwise starts from the
+        oldest buffered event if `replay`, or from now if not. An id this bus
+        never issued (the client saw an earlier server process) counts as none.
+        """
+        with self._cond:
+            cursor = None
+            if last_event_id is not None and str(last_event_id).isdigit():
+                cursor = int(last_event_id)
+                if cursor > self._last_id:
+                    cursor = None
+            if cursor is None:
+                if replay:
+                    cursor = self._ring[0][0] - 1 if self._ring else self._last_id
+                else:
+                    cursor = self._last_id
+            self.subscribers += 1
+
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._last_id > cursor, timeout=heartbeat)
+                    events = self._events_after(cursor)
+                if not events:
+                    yield None
+                    continue
+                cursor = events[-1][0]
+                yield from events
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def subscribe(self, last_event_id: Optional[str] = None, replay: bool = True,
+                  heartbeat: float = HEARTBEAT_SECONDS):
+        """Generator of SSE frames for one client, with keep-alive comments while idle."""
+        for event in self.listen(last_event_id, replay, heartbeat):
+            yield ": keep-alive\n\n" if event is None else event[2]
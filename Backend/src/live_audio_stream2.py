@@ -1,113 +1,374 @@
-import os
 import numpy as np
 import sounddevice as sd
 import webrtcvad
-from resemblyzer import VoiceEncoder, preprocess_wav
-import whisper
-import tempfile
-import scipy.io.wavfile as wavfile
-from transcript_to_suggestions import process_transcript_segment
+import transcript_to_suggestions
 import model_manager
-from concurrent.futures import ThreadPoolExecutor
+import itertools
+import threading
+import time
+import tracing
+from tracing import tracer
+from audio_capture import AudioRingBuffer, SegmentQueue, MERGE
+from streaming_transcribe import IncrementalTranscript
+from speaker_gate import SpeakerGate
+from diarization import OnlineDiarizer
+from endpointing import Endpointer, START, END, SPLIT
+from audio_frontend import SpeechSegment
 
 
 # ==== CONFIG ====
 SAMPLE_RATE = 16000
 FRAME_DURATION = 30  # ms
 VAD_MODE = 1
-MAX_SILENT_FRAMES = int(1000 / FRAME_DURATION)
+MAX_SEGMENT_SECONDS = 15  # longer turns are split at a pause so Whisper never gets one huge chunk
 WHISPER_MODEL_NAME = "tiny.en"
 CALIBRATION_SEGMENTS = 3
+CALIBRATION_SECONDS = 2
 MIN_SEGMENT_DURATION = 1.5  # seconds
+RING_BUFFER_SECONDS = 30
+SEGMENT_QUEUE_SIZE = 4
+SEGMENT_QUEUE_POLICY = MERGE  # or DROP_OLDEST / DROP_NEWEST
+STREAMING_TRANSCRIPTION = True  # re-decode while the speaker is still talking
+STREAM_STEP_SECONDS = 1.0
+SPEAKER_STEP_SECONDS = 0.5
 
-# ==== LOAD MODELS ====
-print("🔁 Loading models...")
-vad = model_manager.get_vad()
-encoder = model_manager.get_encoder()
-whisper_model = model_manager.get_whisper_model()
-
+# Models are fetched from model_manager on first use (or by its warm-up), not at import,
+# so the web server can bind before Whisper and the encoder have loaded
 frame_len_samples = int(SAMPLE_RATE * FRAME_DURATION / 1000)
-self_voiceprint = None
 
 
-def calibrate_self_voice():
-    global self_voiceprint
-    print(f"🎤 Say something {CALIBRATION_SEGMENTS} times (2 seconds each) to calibrate your voice...")
+def pcm16_to_float32(audio_data):
+    """Convert an int16 mic buffer to the mono float32 [-1, 1] array Resemblyzer and Whisper both accept."""
+    return np.squeeze(audio_data).astype(np.float32) / 32768.0
 
-    embeddings = []
-    for i in range(CALIBRATION_SEGMENTS):
-        input(f"👉 Press ENTER and speak sample {i + 1}/{CALIBRATION_SEGMENTS}...")
-        audio = sd.rec(int(2 * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype="int16")
-        sd.wait()
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            wavfile.write(f.name, SAMPLE_RATE, audio)
-            wav_path = f.name
+def _merge_segments(older, newer):
+    # A merged segment no longer matches either segment's partial state, so process it whole;
+    # its speech ended where the newer one's did
+    return (np.concatenate((older[0], newer[0])), None) + tuple(newer[2:])
 
-        wav = preprocess_wav(wav_path)
-        emb = encoder.embed_utterance(wav)
-        embeddings.append(emb)
 
-    self_voiceprint = np.mean(embeddings, axis=0)
-    print("✅ Calibration complete.")
+class ActiveSegment:
+    """Per-segment state shared between the VAD loop and the segment worker."""
 
-def get_voiceprint_and_transcribe(audio_data):
-    duration = len(audio_data) / SAMPLE_RATE
-    if duration < MIN_SEGMENT_DURATION:
-        print(f"⚠️ Skipping short segment ({duration:.2f}s)")
-        return
+    def __init__(self, start_pos, speaker_gate):
+        self.start = start_pos
+        self.speaker = speaker_gate.new_track()
+        # Whisper is fetched on the first partial decode, in the segment worker, so a segment
+        # starting before warm-up has finished doesn't stall the VAD loop while it loads
+        self.transcript = IncrementalTranscript(model_manager.get_whisper_model, SAMPLE_RATE) if STREAMING_TRANSCRIPTION else None
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-        wavfile.write(f.name, SAMPLE_RATE, audio_data)
-        wav_path = f.name
+    @property
+    def rejected(self) -> bool:
+        return self.speaker.decision == "self"
 
-    wav = preprocess_wav(wav_path)
-    speaker_vec = encoder.embed_utterance(wav)
-    similarity = np.dot(self_voiceprint, speaker_vec) / (
-        np.linalg.norm(self_voiceprint) * np.linalg.norm(speaker_vec)
-    )
 
-    if similarity > 0.75:
-        print("🙅 Skipping: this sounds like you.")
-        return
+class AudioPipeline:
+    """VAD → speaker gate → Whisper for one audio source.
 
-    print("💬 Transcribing with Whisper...")
-    result = whisper_model.transcribe(wav_path)
-    print("\n🗣️ Other speaker:", result["text"])
-    process_transcript_segment(model_manager.ctx, result["text"])
+    Owns its ring buffer, segment queue, voiceprint and diarizer; the models
+    themselves are shared. Audio comes in through `feed` (a PortAudio callback,
+    a socket, a file) and each transcribed segment from someone other than the
+    user is handed to `on_transcript(text, speaker)`.
+    """
 
-def listen_and_run():
-    print("🎧 Listening... Press Ctrl+C to stop.")
+    def __init__(self, on_transcript, name: str = "default"):
+        self.name = name
+        self.on_transcript = on_transcript
+        self.vad = webrtcvad.Vad(VAD_MODE)
+        # Keep headroom in the ring so the writer can't lap a segment we are about to copy out
+        max_segment = min(MAX_SEGMENT_SECONDS, RING_BUFFER_SECONDS - 1)
+        self.endpointer = Endpointer(self.vad, SAMPLE_RATE, FRAME_DURATION, max_segment)
+        # The encoder is fetched on first embed, so creating a session doesn't wait for it to load
+        self.speaker_gate = SpeakerGate(model_manager.get_encoder, sample_rate=SAMPLE_RATE)
+        self.diarizer = OnlineDiarizer()
+        self.ring = AudioRingBuffer(int(RING_BUFFER_SECONDS * SAMPLE_RATE))
+        self.segment_queue = SegmentQueue(SEGMENT_QUEUE_SIZE, SEGMENT_QUEUE_POLICY, _merge_segments)
+        self.capture_stats = {"input_overflows": 0, "ring_overruns": 0}
+        self._read_pos = 0  # how far the VAD loop has framed the ring
+        # Segment currently being spoken, shared between the VAD loop and the segment worker
+        self._active_lock = threading.Lock()
+        self._active_segment = None
+        self._stop = threading.Event()
+        self._threads = []
+        # perf_counter() time the speech now being handed to on_transcript ended, for latency accounting
+        self.last_speech_end = None
+        self._utterance_ids = itertools.count(1)
 
-    buffer = []
-    silent_frames = 0
+    # ---- calibration ----
 
-    try:
-        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='int16') as stream:
-            while True:
-                chunk, _ = stream.read(frame_len_samples)
-                chunk = np.squeeze(chunk)
+    def calibrate(self, samples):
+        """Set the user's voiceprint from a few int16 recordings of them speaking."""
+        embeddings = [self.speaker_gate.embed_segment(SpeechSegment.from_pcm16(audio, SAMPLE_RATE)) for audio in samples]
+        self.speaker_gate.set_voiceprint(np.mean(embeddings, axis=0))
+        self.diarizer.reset()
+        return self.speaker_gate.voiceprint
+
+    # ---- input ----
+
+    def feed(self, pcm16):
+        self.ring.write(pcm16)
+
+    def capture_callback(self, indata, frames, time_info, status):
+        if status.input_overflow:
+            self.capture_stats["input_overflows"] += 1
+        self.ring.write(indata[:, 0])
+
+    # ---- lifecycle ----
+
+    @property
+    def ring_lag(self) -> int:
+        """Samples written to the ring that the VAD loop hasn't framed yet."""
+        return self.ring.write_pos - self._read_pos
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self, run_vad_loop: bool = True):
+        """Start the workers; with `run_vad_loop` the VAD loop gets its own thread too."""
+        self._stop.clear()
+        self.ring = AudioRingBuffer(int(RING_BUFFER_SECONDS * SAMPLE_RATE))
+        self._read_pos = 0
+        self.segment_queue = SegmentQueue(SEGMENT_QUEUE_SIZE, SEGMENT_QUEUE_POLICY, _merge_segments)
+        for key in self.capture_stats:
+            self.capture_stats[key] = 0
+
+        targets = [self._inference_worker, self._segment_worker]
+        if run_vad_loop:
+            targets.append(self.run_vad_loop)
+        # Spans from the worker threads are tagged with this pipeline's name as the session
+        with tracing.context(session=self.name):
+            self._threads = [threading.Thread(target=tracing.bind(t), name=f"{self.name}-{t.__name__}", daemon=True)
+                             for t in targets]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.segment_queue.close()
+        # Wake the VAD loop if it is waiting on audio that will never come
+        self.ring.write(np.zeros(0, dtype=np.int16))
+
+    # ---- processing ----
+
+    def process_segment(self, audio_data, segment=None, speech_end_pos=None):
+        duration = len(audio_data) / SAMPLE_RATE
+        if duration < MIN_SEGMENT_DURATION:
+            print(f"⚠️ Skipping short segment ({duration:.2f}s)")
+            return
+
+        # Decode once; the encoder and Whisper both read from this segment and its cached features
+        speech = SpeechSegment.from_pcm16(audio_data, SAMPLE_RATE)
+        audio = speech.samples
+        if segment is not None:
+            # Reuse the rolling partial embeddings instead of embedding the whole segment again
+            speaker_vec = segment.speaker.embedding(speech)
+        else:
+            speaker_vec = self.speaker_gate.embed_segment(speech)
+
+        with tracer.span("similarity"):
+            is_self = self.speaker_gate.is_self(speaker_vec)
+        if is_self:
+            print("🙅 Skipping: this sounds like you.")
+            tracer.count("self_rejections")
+            self.speaker_gate.adapt(speaker_vec)
+            return
+
+        with tracer.span("transcription"):
+            if segment is not None and segment.transcript is not None:
+                print("💬 Finalizing streamed transcript...")
+                text = segment.transcript.finalize(audio)
+            else:
+                print("💬 Transcribing with Whisper...")
+                # Whole-segment decodes skip the quiet edges; streamed ones keep sample offsets intact
+                text = model_manager.get_whisper_model().transcribe(speech.trimmed)["text"]
+        tracer.count("utterances")
+        speaker = self.diarizer.assign(speaker_vec)
+        print(f"\n🗣️ {speaker}:", text)
+        self.last_speech_end = self.ring.time_of(speech_end_pos) if speech_end_pos is not None else None
+        self.on_transcript(text, speaker)
+
+    def _inference_worker(self):
+        while True:
+            item = self.segment_queue.get()
+            if item is None:
+                return
+            audio_data, segment, speech_end, utterance = item
+            try:
+                with tracing.context(utterance=utterance):
+                    self.process_segment(audio_data, segment, speech_end)
+            except Exception as e:
+                print(f"❌ Inference error: {e}")
+
+    def _segment_worker(self):
+        """Gate the in-progress segment on speaker and, once it is someone else, stream Whisper over it."""
+        gated_until = 0
+        decoded_until = 0
+        while not self._stop.is_set():
+            with self._active_lock:
+                segment = self._active_segment
+            end = self.ring.write_pos
+            if segment is None or segment.rejected:
+                time.sleep(FRAME_DURATION / 1000)
+                continue
+
+            gate_due = segment.speaker.decision is None and end - gated_until >= SPEAKER_STEP_SECONDS * SAMPLE_RATE
+            decode_due = (
+                segment.speaker.decision == "other"
+                and segment.transcript is not None
+                and end - segment.start >= MIN_SEGMENT_DURATION * SAMPLE_RATE
+                and end - decoded_until >= STREAM_STEP_SECONDS * SAMPLE_RATE
+            )
+            if not (gate_due or decode_due):
+                time.sleep(FRAME_DURATION / 1000)
+                continue
+
+            try:
+                audio = pcm16_to_float32(self.ring.read(segment.start, end))
+            except IndexError:
+                continue
+
+            if gate_due:
+                gated_until = end
+                if segment.speaker.update(audio) == "self":
+                    print("🙅 Early reject: this sounds like you.")
+            else:
+                decoded_until = end
+                with tracer.span("transcription_partial"):
+                    partial = segment.transcript.update(audio)
+                print(f"📝 Partial: {partial}")
+
+    def _start_segment(self, start_pos):
+        with self._active_lock:
+            self._active_segment = ActiveSegment(start_pos, self.speaker_gate)
+
+    def _end_segment(self):
+        with self._active_lock:
+            segment, self._active_segment = self._active_segment, None
+        return segment
 
-                if len(chunk) != frame_len_samples:
+    def run_vad_loop(self):
+        """Frame the ring, endpoint it and queue finished segments until stopped."""
+        ring = self.ring
+        endpointer = self.endpointer
+        endpointer.reset()
+        read_pos = 0
+
+        while not self._stop.is_set():
+            if not ring.wait_for(read_pos + frame_len_samples, timeout=1.0):
+                continue
+
+            if read_pos < ring.oldest_pos():
+                # We fell a full ring behind; the lost audio can't be recovered
+                self.capture_stats["ring_overruns"] += 1
+                read_pos = self._read_pos = ring.write_pos
+                self._end_segment()
+                endpointer.reset(floor_pos=read_pos)
+                continue
+
+            chunk = ring.read(read_pos, read_pos + frame_len_samples)
+            pos = read_pos
+            read_pos = self._read_pos = read_pos + frame_len_samples
+
+            for event in endpointer.push(chunk, pos):
+                if event[0] == START:
+                    self._start_segment(event[1])
+                    continue
+
+                kind, start, end, speech_end = event
+                segment = self._end_segment()
+                if kind == SPLIT:
+                    # The turn goes on; its partial state covers audio past the split, so the
+                    # first part is processed whole and a fresh segment takes over from here
+                    self._start_segment(end)
+                if segment is not None and segment.rejected:
+                    continue
+                print("🧠 Pause detected." if kind == END else "✂️ Long turn split at a pause.")
+                utterance = f"{self.name}-{next(self._utterance_ids)}"
+                arrived = ring.time_of(speech_end)
+                if arrived is not None and kind == END:
+                    # Hangover plus framing: how long after the last word the segment was cut
+                    tracer.observe("endpointing", (time.perf_counter() - arrived) * 1000,
+                                   session=self.name, utterance=utterance)
+                try:
+                    audio = ring.read(start, end)
+                except IndexError:
+                    self.capture_stats["ring_overruns"] += 1
                     continue
+                self.segment_queue.put((audio, segment if kind == END else None, speech_end, utterance))
+
+    def stats(self) -> dict:
+        """Counters for spotting when inference falls behind the audio source."""
+        return {
+            **self.capture_stats,
+            "ring_lag": self.ring_lag,
+            **self.segment_queue.stats(),
+            "early_self_rejections": self.speaker_gate.early_rejections,
+            "voiceprint_adaptations": self.speaker_gate.adaptations,
+            "speakers": self.diarizer.num_speakers,
+            **self.endpointer.stats(),
+        }
+
+
+# ==== LOCAL MICROPHONE ====
+
+def _process_default(text, speaker):
+    # Look the processor up at call time so wrappers installed on the module apply
+    transcript_to_suggestions.process_transcript_segment(model_manager.ctx, text, speaker)
+
+
+_default_pipeline = None
 
-                is_speech = vad.is_speech(chunk.tobytes(), SAMPLE_RATE)
-                buffer.append(chunk)
 
-                if is_speech:
-                    silent_frames = 0
-                else:
-                    silent_frames += 1
+def get_default_pipeline() -> AudioPipeline:
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = AudioPipeline(_process_default)
+    return _default_pipeline
 
-                if silent_frames >= MAX_SILENT_FRAMES and len(buffer) > 0:
-                    print("🧠 Pause detected.")
-                    full_audio = np.concatenate(buffer)
-                    get_voiceprint_and_transcribe(full_audio)
-                    buffer.clear()
-                    silent_frames = 0
 
+def record_calibration_samples(prompt=input):
+    """Record CALIBRATION_SEGMENTS short clips from the local mic, calling `prompt` before each."""
+    print(f"🎤 Say something {CALIBRATION_SEGMENTS} times ({CALIBRATION_SECONDS} seconds each) to calibrate your voice...")
+    samples = []
+    for i in range(CALIBRATION_SEGMENTS):
+        prompt(f"👉 Press ENTER and speak sample {i + 1}/{CALIBRATION_SEGMENTS}...")
+        audio = sd.rec(int(CALIBRATION_SECONDS * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype="int16")
+        sd.wait()
+        samples.append(audio)
+    return samples
+
+
+def calibrate_self_voice(prompt=input, pipeline: AudioPipeline = None):
+    pipeline = pipeline or get_default_pipeline()
+    pipeline.calibrate(record_calibration_samples(prompt))
+    print("✅ Calibration complete.")
+
+
+def get_capture_stats() -> dict:
+    return get_default_pipeline().stats()
+
+
+def listen_and_run(pipeline: AudioPipeline = None, stop_event: threading.Event = None):
+    """Feed the local microphone into `pipeline` and run its VAD loop on this thread until stopped.
+
+    `stop_event` covers a stop that lands while the pipeline is starting up.
+    """
+    pipeline = pipeline or get_default_pipeline()
+    print("🎧 Listening... Press Ctrl+C to stop.")
+
+    pipeline.start(run_vad_loop=False)
+    if stop_event is not None and stop_event.is_set():
+        pipeline.stop()
+    try:
+        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='int16',
+                            blocksize=frame_len_samples, callback=pipeline.capture_callback):
+            pipeline.run_vad_loop()
     except KeyboardInterrupt:
         print("\n🛑 Stopped.")
+    finally:
+        pipeline.stop()
 
 if __name__ == "__main__":
     calibrate_self_voice()
@@ -1,13 +1,13 @@
-import whisper
+import os
 import sounddevice as sd
 import numpy as np
-import scipy.io.wavfile as wavfile
-import tempfile
 import queue
 import threading
 import time
+from asr_backends import load_backend
 
-model = whisper.load_model("base")
+# Same backend switches as model_manager, but this standalone demo keeps the larger "base" model
+model = load_backend(os.getenv("ASR_BACKEND", "torch"), "base", int(os.getenv("ASR_NUM_THREADS", "0")))
 q = queue.Queue()
 recording = True
 CHUNK_DURATION = 5  # seconds
@@ -38,12 +38,11 @@ def transcribe_loop():
         if not audio_data:
             continue
 
-        audio_np = np.concatenate(audio_data, axis=0)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            wavfile.write(f.name, 16000, audio_np)
-            print("🧠 Transcribing...")
-            result = model.transcribe(f.name)
-            print("💬", result["text"], "\n")
+        # The callback delivers float32 frames already, so Whisper can take them directly
+        audio_np = np.concatenate(audio_data, axis=0).flatten()
+        print("🧠 Transcribing...")
+        result = model.transcribe(audio_np)
+        print("💬", result["text"], "\n")
 
 try:
     threading.Thread(target=record_audio).start()
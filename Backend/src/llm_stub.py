@@ -0,0 +1,154 @@
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# {n} makes every reply distinct, so TTS is not served from the phrase cache after the first turn
+STUB_REPLY = "Suggestion {n}: they seem curious about your experience, so share one concrete example and ask what matters most to them."
+DEFAULT_PORT = 8765
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubLLM:
+    """Offline stand-in for the Gemini model with the same `generate_content` interface.
+
+    Answers every prompt with a canned reply after `latency_ms`; when streamed,
+    the first chunk arrives after `latency_ms` and the rest `chunk_ms` apart.
+    A `slow_rate` fraction of calls takes `slow_ms` instead, to reproduce the
+    tail latency the suggestion deadline and hedging are there for.
+    """
+
+    def __init__(self, latency_ms: float = 300.0, chunk_ms: float = 20.0, reply: str = STUB_REPLY,
+                 words_per_chunk: int = 3, slow_rate: float = 0.0, slow_ms: float = 3000.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.chunk_ms = chunk_ms
+        self.reply = reply
+        self.words_per_chunk = words_per_chunk
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _latency_s(self) -> float:
+        with self._lock:
+            slow = self._random.random() < self.slow_rate
+        return (self.slow_ms if slow else self.latency_ms) / 1000
+
+    def _chunks(self, reply: str):
+        words = reply.split(" ")
+        for i in range(0, len(words), self.words_per_chunk):
+            # Keep the separating space on the chunk boundary the way streamed text does
+            yield " ".join(words[i:i + self.words_per_chunk]) + ("" if i + self.words_per_chunk >= len(words) else " ")
+
+    def _stream(self, reply: str, latency_s: float):
+        time.sleep(latency_s)
+        for i, chunk in enumerate(self._chunks(reply)):
+            if i:
+                time.sleep(self.chunk_ms / 1000)
+            yield _Chunk(chunk)
+
+    def generate_content(self, prompt, stream: bool = False):
+        with self._lock:
+            self.calls += 1
+            reply = self.reply.format(n=self.calls)
+        latency_s = self._latency_s()
+        if stream:
+            return self._stream(reply, latency_s)
+        time.sleep(latency_s)
+        return _Chunk(reply)
+
+
+# ==== LOCAL STUB SERVER ====
+
+class HTTPLLM:
+    """`generate_content` client for a stub server started with `serve`.
+
+    Goes over a real socket, so timeouts, hedged requests and slow responses
+    behave the way they do against Gemini, without network access or a key.
+    """
+
+    def __init__(self, url: str = f"http://127.0.0.1:{DEFAULT_PORT}", timeout: float = 30.0):
+        self.url = url.rstrip("/") + "/generate"
+        self.timeout = timeout
+
+    def _open(self, prompt, stream: bool):
+        body = json.dumps({"prompt": str(prompt), "stream": stream}).encode()
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _stream(self, prompt):
+        with self._open(prompt, True) as response:
+            for line in response:
+                if line.strip():
+                    yield _Chunk(json.loads(line)["text"])
+
+    def generate_content(self, prompt, stream: bool = False):
+        if stream:
+            return self._stream(prompt)
+        with self._open(prompt, False) as response:
+            return _Chunk(json.loads(response.read())["text"])
+
+
+def serve(llm: StubLLM, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Serve `llm` at POST /generate ({"prompt", "stream"}); streamed replies are one JSON line per chunk."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/generate":
+                self.send_error(404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                if request.get("stream"):
+                    for chunk in llm.generate_content(request.get("prompt", ""), stream=True):
+                        self.wfile.write((json.dumps({"text": chunk.text}) + "\n").encode())
+                        self.wfile.flush()
+                else:
+                    self.wfile.write(json.dumps({"text": llm.generate_content(request.get("prompt", "")).text}).encode())
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up on this request, e.g. it lost a hedge or hit its deadline
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the stub LLM over HTTP (use with LLM_BACKEND=http).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--chunk-ms", type=float, default=20.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=3000.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    llm = StubLLM(args.latency_ms, args.chunk_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms, seed=args.seed)
+    server = serve(llm, args.host, args.port)
+    print(f"🤖 Stub LLM listening on http://{args.host}:{args.port}/generate")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,167 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+import tracing
 from model_manager import (
-    get_gemini_model,
-    get_tts_model,
-    get_sentiment_analyzer,
-    get_emotion_analyzer,
+    scheduler,
+    get_tts_engine,
+    readiness_report,
+    shutdown_worker_pool,
+    start_background_warm_up,
 )
+from audio_capture import decode_frames, ENCODINGS, PCM16
+from session_manager import sessions
+from transcript_to_suggestions import suggestion_stats
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Initialize models on startup
-    get_gemini_model()
-    get_tts_model()
-    get_sentiment_analyzer()
-    get_emotion_analyzer()
-    print("✅ Models initialized and ready to go.")
+    # Load and warm every model in parallel behind the server; /ready reports progress
+    start_background_warm_up()
     
     yield  # ← this allows the app to run
     
-    # Optional: Cleanup logic here if needed on shutdown
+    shutdown_worker_pool()
 
 app = FastAPI(lifespan=lifespan)
 
+@app.get("/tts_stats")
+def tts_stats():
+    return get_tts_engine().stats()
+
+@app.get("/suggestion_stats")
+def suggestions():
+    return suggestion_stats()
+
 @app.get("/healthcheck")
 def check():
-    return {"status": "OK"}
\ No newline at end of file
+    return {"status": "OK"}
+
+@app.get("/ready")
+def ready(response: Response):
+    report = readiness_report()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(tracing.metrics_text(scheduler.stats()), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+def traces(session: str = None, utterance: str = None, limit: str = "200"):
+    # Parsed here so a malformed limit is a 400 like the Flask app's, not FastAPI's 422
+    try:
+        count = int(limit)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise HTTPException(status_code=400, detail="limit must be a positive integer")
+    return tracing.tracer.recent(session, utterance, count)
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def profile(seconds: float = 5, hz: float = 100):
+    if not tracing.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Set PROFILER_ENABLED=1 to allow profiling")
+    if not (seconds > 0 and hz > 0):
+        raise HTTPException(status_code=400, detail="seconds and hz must be positive numbers")
+    return tracing.sample_stacks(seconds, hz)
+
+@app.websocket("/ws/audio")
+async def audio_socket(websocket: WebSocket, session: str = None, encoding: str = PCM16, tts: bool = False):
+    """Stream a remote microphone into a session's VAD → speaker gate → Whisper pipeline.
+
+    Client → server: binary frames of 16 kHz mono audio (`encoding` pcm16 or mulaw),
+    plus JSON text messages {"type": "calibrate_start"} / {"type": "calibrate_end"}
+    around a few seconds of the user's own voice.
+    Server → client: JSON {"type": "message", ...} for transcripts and suggestions and,
+    with ?tts=true, a JSON {"type": "audio", ...} header followed by raw PCM16 bytes.
+    """
+    if encoding not in ENCODINGS:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"Unsupported encoding: {encoding}")
+        return
+    await websocket.accept()
+    # A session this socket created ends with it; one it joined is only stopped
+    created = session is None or sessions.get(session) is None
+    sess = sessions.get_or_create(session) if session else sessions.create()
+    if sess.is_listening:
+        await websocket.send_json({"type": "error", "message": f"Session {sess.id} is already streaming"})
+        await websocket.close()
+        return
+    loop = asyncio.get_running_loop()
+    send_lock = asyncio.Lock()
+    # Events are pushed from the publisher's thread into this queue; no executor thread per client
+    events = asyncio.Queue()
+
+    def on_event(event):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def send_audio(audio):
+        async with send_lock:
+            await websocket.send_json({
+                "type": "audio",
+                "sample_rate": audio.frame_rate,
+                "channels": audio.channels,
+                "sample_width": audio.sample_width,
+                "bytes": len(audio.raw_data),
+            })
+            await websocket.send_bytes(audio.raw_data)
+
+    async def forward_events():
+        while True:
+            event = await events.get()
+            for message in event[1]:
+                async with send_lock:
+                    await websocket.send_json({"type": "message", **message})
+
+    def sink(audio):
+        # Called from the session's playback worker; hand off to the event loop without waiting on the send
+        asyncio.run_coroutine_threadsafe(send_audio(audio), loop).add_done_callback(report_send_error)
+
+    def report_send_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"❌ Could not send audio to {sess.id}: {future.exception()}")
+
+    sess.remote = True
+    if tts:
+        sess.audio_sink = sink
+
+    sess.events.add_listener(on_event)
+    forwarder = asyncio.create_task(forward_events())
+    calibration = None
+
+    try:
+        await websocket.send_json({"type": "session", "session": sess.id})
+        sess.pipeline.start()
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            if frame.get("bytes") is not None:
+                samples = decode_frames(frame["bytes"], encoding)
+                if calibration is not None:
+                    calibration.append(samples)
+                else:
+                    sess.pipeline.feed(samples)
+                continue
+
+            control = json.loads(frame.get("text") or "{}")
+            if control.get("type") == "calibrate_start":
+                calibration = []
+            elif control.get("type") == "calibrate_end" and calibration:
+                await asyncio.to_thread(sess.pipeline.calibrate, [np.concatenate(calibration)])
+                calibration = None
+                await websocket.send_json({"type": "calibrated"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        sess.events.remove_listener(on_event)
+        sess.audio_sink = None
+        sess.remote = False
+        if created:
+            sessions.close(sess.id)
+        else:
+            sess.pipeline.stop()
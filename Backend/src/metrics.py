@@ -0,0 +1,59 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RECENT_SAMPLES = 1024
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)  # last slot is +Inf
+        self._recent = deque(maxlen=RECENT_SAMPLES)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self._recent.append(ms)
+            self.count += 1
+            self.sum_ms += ms
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - start) * 1000)
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+        cumulative, buckets = 0, {}
+        for le, n in zip(self.buckets_ms + ("+Inf",), counts):
+            cumulative += n
+            buckets[str(le)] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets,
+        }
@@ -1,95 +1,260 @@
 import os
 import time
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import List, Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
-from transformers import pipeline
-from elevenlabs import Voice, VoiceSettings
+import numpy as np
 import webrtcvad
-from resemblyzer import VoiceEncoder, preprocess_wav
-import whisper
+from scheduler import ModelScheduler
+
+# asr_backends (whisper), transformers, resemblyzer, elevenlabs and genai are imported inside
+# their getters so importing this module (and binding the web server) is fast
 
 
 load_dotenv()
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 _eleven_api_key = os.getenv("ELEVEN_API_KEY")
-WHISPER_MODEL_NAME = "tiny.en"
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "tiny.en")
+ASR_BACKEND = os.getenv("ASR_BACKEND", "torch")  # torch | int8 | ctranslate2
+ASR_NUM_THREADS = int(os.getenv("ASR_NUM_THREADS", "0"))  # 0 leaves the runtime's default
 VAD_MODE = 1
+AFFECT_BACKEND = os.getenv("AFFECT_BACKEND", "torch")  # torch | int8 | onnx
+AFFECT_NUM_THREADS = int(os.getenv("AFFECT_NUM_THREADS", "0"))  # 0 leaves torch's default
+# >0 hosts Whisper, the encoder and the affect analyzer in that many worker processes
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "0"))
+# How many calls to each shared model may run at once across all sessions
+MODEL_CONCURRENCY = {
+    "whisper": int(os.getenv("WHISPER_CONCURRENCY", str(MODEL_WORKERS or 1))),
+    "encoder": int(os.getenv("ENCODER_CONCURRENCY", str(max(2, MODEL_WORKERS)))),
+    "affect": int(os.getenv("AFFECT_CONCURRENCY", str(MODEL_WORKERS or 1))),
+}
+TTS_ENGINE = os.getenv("TTS_ENGINE", "elevenlabs")  # elevenlabs | local | stub
+TTS_STUB_LATENCY_MS = float(os.getenv("TTS_STUB_LATENCY_MS", "0"))
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # gemini | stub | http
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "300"))
+LLM_STUB_SLOW_RATE = float(os.getenv("LLM_STUB_SLOW_RATE", "0"))  # fraction of stub calls that take LLM_STUB_SLOW_MS
+LLM_STUB_SLOW_MS = float(os.getenv("LLM_STUB_SLOW_MS", "3000"))
+LLM_URL = os.getenv("LLM_URL", "http://127.0.0.1:8765")  # `python llm_stub.py` serves here
 
 
-if not gemini_api_key:
+if not gemini_api_key and LLM_BACKEND == "gemini":
     raise Exception("GEMINI_API_KEY not found in environment variables.")
 
-if not _eleven_api_key:
+if not _eleven_api_key and TTS_ENGINE == "elevenlabs":
     raise Exception("ELEVEN_API_KEY not found in environment variables.")
 
-_eleven_voice = Voice(
-    voice_id="Rachel",  # You can use any available voice
-    settings=VoiceSettings(
-        stability=0.5,
-        similarity_boost=0.75
-    )
-)
+# Prompt budget for the conversation part of the coaching prompt (Gemini tokens, estimated)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "400"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "120"))
+SUMMARY_WORDS_PER_TURN = 12
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English); no tokenizer round-trip."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
 
 class ContextBlock:
     def __init__(self, text: str, speaker: str = "unknown", timestamp: Optional[float] = None):
         self.text = text.strip()
         self.speaker = speaker
         self.timestamp = timestamp or time.time()
+        self._line = None
+        self.tokens = estimate_tokens(str(self))
 
     def __str__(self):
-        return f"[{self.speaker} @ {time.strftime('%H:%M:%S', time.localtime(self.timestamp))}]: {self.text}"
+        if self._line is None:
+            self._line = f"[{self.speaker} @ {time.strftime('%H:%M:%S', time.localtime(self.timestamp))}]: {self.text}"
+        return self._line
+
+
+def summarize_turns(summary: str, evicted: List[ContextBlock], max_tokens: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Fold evicted turns into the running summary without an LLM call.
+
+    Each turn keeps its speaker and first few words; once the summary is over
+    budget its oldest entries drop off, so the cost is per eviction, not per prompt.
+    """
+    entries = [e for e in summary.split(" | ") if e] if summary else []
+    for block in evicted:
+        words = block.text.split()
+        gist = " ".join(words[:SUMMARY_WORDS_PER_TURN]) + ("..." if len(words) > SUMMARY_WORDS_PER_TURN else "")
+        entries.append(f"{block.speaker}: {gist}")
+    while len(entries) > 1 and estimate_tokens(" | ".join(entries)) > max_tokens:
+        entries.pop(0)
+    return " | ".join(entries)
 
 
 class ContextWindow:
-    def __init__(self, max_blocks: int = 2):
+    """Recent conversation turns under a token budget, plus a rolling summary of older ones.
+
+    Turns live in a deque; when the total goes over `max_tokens` the oldest are
+    evicted and folded into the summary by `summarizer(summary, evicted)`, which
+    only runs on eviction. The formatted text is cached until the next change.
+    `max_blocks` additionally caps the number of verbatim turns when set.
+    """
+
+    def __init__(self, max_tokens: int = CONTEXT_TOKEN_BUDGET, max_blocks: Optional[int] = None,
+                 summary_tokens: int = SUMMARY_TOKEN_BUDGET, summarizer=summarize_turns):
+        self.max_tokens = max_tokens
         self.max_blocks = max_blocks
-        self.blocks: List[ContextBlock] = []
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.blocks = deque()
+        self.summary = ""
+        self.evicted = 0
+        self._tokens = 0
+        self._text_cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the verbatim turns plus the summary."""
+        return self._tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def _over_budget(self) -> bool:
+        if self.max_blocks is not None and len(self.blocks) > self.max_blocks:
+            return True
+        return len(self.blocks) > 1 and self.tokens > self.max_tokens
 
     def add(self, text: str, speaker: str = "User"):
         block = ContextBlock(text, speaker)
-        self.blocks.append(block)
-        if len(self.blocks) > self.max_blocks:
-            self.blocks.pop(0)
+        with self._lock:
+            self.blocks.append(block)
+            self._tokens += block.tokens
+            while self._over_budget():
+                old = self.blocks.popleft()
+                self._tokens -= old.tokens
+                self.evicted += 1
+                if self.summarizer is not None:
+                    self.summary = self.summarizer(self.summary, [old], self.summary_tokens)
+            self._text_cache.clear()
 
     def get_context_as_text(self, separator: str = "\n") -> str:
-        return separator.join(str(block) for block in self.blocks)
+        key = ("context", separator)
+        text = self._text_cache.get(key)
+        if text is None:
+            with self._lock:
+                lines = [f"[Earlier in the conversation]: {self.summary}"] if self.summary else []
+                lines.extend(str(block) for block in self.blocks)
+                text = self._text_cache[key] = separator.join(lines)
+        return text
 
     def get_raw_text(self) -> str:
-        return " ".join(block.text for block in self.blocks)
+        text = self._text_cache.get("raw")
+        if text is None:
+            with self._lock:
+                text = self._text_cache["raw"] = " ".join(block.text for block in self.blocks)
+        return text
 
     def clear(self):
-        self.blocks = []
+        with self._lock:
+            self.blocks = deque()
+            self.summary = ""
+            self._tokens = 0
+            self._text_cache.clear()
 
-ctx = ContextWindow(max_blocks = 2)
+ctx = ContextWindow()
 
 
-        
-genai.configure(api_key=gemini_api_key)
-
 # --- Lazy Singletons ---
+# Heavy models are loaded once and shared by every session through the scheduler
+scheduler = ModelScheduler(MODEL_CONCURRENCY)
 _gemini_model = None
 _eleven_voice = None
-_sentiment_pipeline = None
-_emotion_pipeline = None
+_affect_analyzer = None
+_tts_engine = None
 _whisper_model = None 
 _encoder = None
 _vad = None
+_worker_pool = None
+
+# Per-model load locks so parallel warm-up never loads the same model twice
+_load_locks = defaultdict(threading.Lock)
+# name -> {"state", "load_s", "warmup_s", "error"}
+readiness = {}
+
+@contextmanager
+def _loading(name: str):
+    entry = readiness.setdefault(name, {"state": "pending"})
+    entry["state"] = "loading"
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        entry.update(state="error", error=str(e))
+        raise
+    entry.update(state="loaded", load_s=round(time.perf_counter() - start, 3))
+
+def get_worker_pool():
+    global _worker_pool
+    if _worker_pool is None:
+        with _load_locks["worker_pool"]:
+            if _worker_pool is None:
+                from model_workers import ProcessModelPool
+                config = {
+                    "asr_backend": ASR_BACKEND,
+                    "whisper_model": WHISPER_MODEL_NAME,
+                    "affect_backend": AFFECT_BACKEND,
+                }
+                if ASR_NUM_THREADS:
+                    config["threads"] = ASR_NUM_THREADS
+                # Every worker loads all three at start-up so any of them can take any call
+                _worker_pool = ProcessModelPool(MODEL_WORKERS, config, preload=("whisper", "encoder", "affect"))
+    return _worker_pool
+
+def shutdown_worker_pool():
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool = None
 
 def get_gemini_model():
     global _gemini_model
     if _gemini_model is None:
-        _gemini_model = genai.GenerativeModel("models/gemini-1.5-flash-latest")
+        with _load_locks["gemini"]:
+            if _gemini_model is None:
+                with _loading("gemini"):
+                    if LLM_BACKEND == "stub":
+                        from llm_stub import StubLLM
+                        _gemini_model = StubLLM(latency_ms=LLM_STUB_LATENCY_MS, slow_rate=LLM_STUB_SLOW_RATE,
+                                                slow_ms=LLM_STUB_SLOW_MS)
+                    elif LLM_BACKEND == "http":
+                        from llm_stub import HTTPLLM
+                        _gemini_model = HTTPLLM(LLM_URL)
+                    elif LLM_BACKEND == "gemini":
+                        import google.generativeai as genai
+                        genai.configure(api_key=gemini_api_key)
+                        _gemini_model = genai.GenerativeModel("models/gemini-1.5-flash-latest")
+                    else:
+                        raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
     return _gemini_model
 def get_whisper_model():
     global _whisper_model
     if _whisper_model is None:
-        _whisper_model = whisper.load_model(WHISPER_MODEL_NAME)
+        with _load_locks["whisper"]:
+            if _whisper_model is None:
+                with _loading("whisper"):
+                    if MODEL_WORKERS:
+                        model = get_worker_pool().model("whisper")
+                    else:
+                        from asr_backends import load_backend
+                        model = load_backend(ASR_BACKEND, WHISPER_MODEL_NAME, ASR_NUM_THREADS)
+                    _whisper_model = scheduler.wrap("whisper", model)
     return _whisper_model
 def get_encoder():
     global _encoder
     if _encoder is None:
-        _encoder = VoiceEncoder()
+        with _load_locks["encoder"]:
+            if _encoder is None:
+                with _loading("encoder"):
+                    if MODEL_WORKERS:
+                        model = get_worker_pool().model("encoder")
+                    else:
+                        from resemblyzer import VoiceEncoder
+                        model = VoiceEncoder()
+                    _encoder = scheduler.wrap("encoder", model)
     return _encoder
 
 def get_vad():
@@ -98,22 +263,24 @@ def get_vad():
         _vad = webrtcvad.Vad(VAD_MODE)
     return _vad
 
-
-def get_sentiment_analyzer():
-    global _sentiment_pipeline
-    if _sentiment_pipeline is None:
-        _sentiment_pipeline = pipeline("sentiment-analysis")
-    return _sentiment_pipeline
-
-def get_emotion_analyzer():
-    global _emotion_pipeline
-    if _emotion_pipeline is None:
-        _emotion_pipeline = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base", top_k=1)
-    return _emotion_pipeline
+def get_affect_analyzer():
+    global _affect_analyzer
+    if _affect_analyzer is None:
+        with _load_locks["affect"]:
+            if _affect_analyzer is None:
+                with _loading("affect"):
+                    if MODEL_WORKERS:
+                        model = get_worker_pool().model("affect")
+                    else:
+                        from affect_analyzer import TextAffectAnalyzer
+                        model = TextAffectAnalyzer(AFFECT_BACKEND, AFFECT_NUM_THREADS)
+                    _affect_analyzer = scheduler.wrap("affect", model)
+    return _affect_analyzer
 
 def get_tts_model():
     global _eleven_voice
     if _eleven_voice is None:
+        from elevenlabs import Voice, VoiceSettings
         _eleven_voice = Voice(
             voice_id="onwK4e9ZLuTAKqWW03F9",  # Replace with your preferred voice
             settings=VoiceSettings(
@@ -121,4 +288,90 @@ def get_tts_model():
                 similarity_boost=0.75
             )
         )
-    return _eleven_voice
\ No newline at end of file
+    return _eleven_voice
+
+def get_tts_engine():
+    global _tts_engine
+    if _tts_engine is None:
+        with _load_locks["tts"]:
+            if _tts_engine is None:
+                with _loading("tts"):
+                    from tts_engines import ElevenLabsEngine, LocalEngine, StubEngine
+                    if TTS_ENGINE == "elevenlabs":
+                        _tts_engine = ElevenLabsEngine(_eleven_api_key, get_tts_model())
+                    elif TTS_ENGINE == "local":
+                        _tts_engine = LocalEngine()
+                    elif TTS_ENGINE == "stub":
+                        _tts_engine = StubEngine(latency_ms=TTS_STUB_LATENCY_MS)
+                    else:
+                        raise ValueError(f"Unknown TTS_ENGINE: {TTS_ENGINE}")
+    return _tts_engine
+
+# --- Warm-up ---
+
+def _warm_whisper():
+    get_whisper_model().transcribe(np.zeros(16000, dtype=np.float32))
+
+def _warm_encoder():
+    noise = (np.random.default_rng(0).standard_normal(32000) * 0.01).astype(np.float32)
+    get_encoder().embed_utterance(noise)
+
+def _warm_affect():
+    get_affect_analyzer().analyze("Thanks for coming in today.")
+
+def _warm_tts():
+    get_tts_engine().warm_up()
+    # Fallbacks are spoken on every anger/disgust turn, so have their audio ready before the first one.
+    # Done here rather than at import so importing the app (or a spawned model worker) synthesizes nothing
+    from transcript_to_suggestions import prerender_fallbacks
+    prerender_fallbacks()
+
+# Loader plus one dummy inference per model, so the first real turn pays neither
+WARM_UP_STEPS = {
+    "gemini": get_gemini_model,
+    "whisper": _warm_whisper,
+    "encoder": _warm_encoder,
+    "affect": _warm_affect,
+    "tts": _warm_tts,
+}
+
+def _warm_one(name: str):
+    step = WARM_UP_STEPS[name]
+    readiness.setdefault(name, {"state": "pending"})
+    start = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        print(f"❌ Warm-up failed for {name}: {e}")
+        readiness[name].update(state="error", error=str(e))
+        return
+    entry = readiness[name]
+    entry["state"] = "ready"
+    # Whatever the step took beyond loading was the dummy inference
+    entry["warmup_s"] = round(time.perf_counter() - start - entry.get("load_s", 0.0), 3)
+
+def warm_up(names=None, parallel: bool = True) -> dict:
+    """Load the given models (all by default), each followed by one dummy inference."""
+    names = list(names or WARM_UP_STEPS)
+    for name in names:
+        readiness.setdefault(name, {"state": "pending"})
+    start = time.perf_counter()
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="warmup") as pool:
+            list(pool.map(_warm_one, names))
+    else:
+        for name in names:
+            _warm_one(name)
+    print(f"✅ Models warmed up in {time.perf_counter() - start:.2f}s")
+    return readiness_report()
+
+def start_background_warm_up(names=None) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(names,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready() -> bool:
+    return bool(readiness) and all(entry["state"] == "ready" for entry in readiness.values())
+
+def readiness_report() -> dict:
+    return {"ready": is_ready(), "models": {name: dict(entry) for name, entry in readiness.items()}}
@@ -0,0 +1,183 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import tracing
+
+
+# Arrays at least this large travel through shared memory instead of being pickled
+SHM_MIN_BYTES = 64 * 1024
+
+WHISPER = "whisper"
+ENCODER = "encoder"
+AFFECT = "affect"
+
+
+# ==== WORKER SIDE ====
+# Each worker process loads its own copy of a model the first time it is asked for it
+
+_worker_config = {}
+_worker_models = {}
+
+
+def _init_worker(config: dict, preload):
+    # Spans are timed in the parent; a worker appending to the same trace log would only duplicate them untagged
+    tracing.tracer = tracing.Tracer(log_path=None)
+    _worker_config.update(config)
+    threads = config.get("threads") or 0
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    for name in preload:
+        _worker_model(name)
+
+
+def _worker_model(name: str):
+    if name not in _worker_models:
+        if name == WHISPER:
+            from asr_backends import load_backend
+            _worker_models[name] = load_backend(_worker_config["asr_backend"], _worker_config["whisper_model"],
+                                                _worker_config.get("threads") or 0)
+        elif name == ENCODER:
+            from resemblyzer import VoiceEncoder
+            _worker_models[name] = VoiceEncoder(device="cpu")
+        elif name == AFFECT:
+            from affect_analyzer import TextAffectAnalyzer
+            _worker_models[name] = TextAffectAnalyzer(_worker_config["affect_backend"], _worker_config.get("threads") or 0)
+        else:
+            raise ValueError(f"Unknown worker model: {name}")
+    return _worker_models[name]
+
+
+class _SharedArray:
+    """Picklable handle to an ndarray the parent placed in shared memory."""
+
+    def __init__(self, shm_name: str, shape, dtype: str):
+        self.shm_name = shm_name
+        self.shape = shape
+        self.dtype = dtype
+
+    def attach(self):
+        # Spawned workers share the parent's resource tracker, so attaching doesn't
+        # add a second owner; the parent unlinks the block once the call is done
+        shm = shared_memory.SharedMemory(name=self.shm_name)
+        return shm, np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
+def _run_in_worker(name: str, method: str, args, kwargs):
+    attached = []
+
+    def unwrap(value):
+        if isinstance(value, _SharedArray):
+            shm, array = value.attach()
+            attached.append(shm)
+            return array
+        return value
+
+    try:
+        args = [unwrap(a) for a in args]
+        kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+        return getattr(_worker_model(name), method)(*args, **kwargs)
+    finally:
+        # Drop our views before closing the mappings
+        del args, kwargs
+        for shm in attached:
+            shm.close()
+
+
+# ==== PARENT SIDE ====
+
+class ProcessModelPool:
+    """Hosts Whisper, the voice encoder and the affect analyzer in worker processes.
+
+    Every call goes to whichever worker is free, so concurrent segments or
+    sessions decode on separate cores instead of taking turns on one GIL. Large
+    numpy arguments are copied once into shared memory and only their handle is
+    pickled; results come back through futures.
+    """
+
+    def __init__(self, num_workers: int, config: dict, preload=()):
+        self.num_workers = num_workers
+        config = dict(config)
+        # Split the cores between workers so their intra-op thread pools don't oversubscribe
+        config.setdefault("threads", max(1, (os.cpu_count() or 1) // num_workers))
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp.get_context("spawn"),  # torch is not fork-safe once its threads have started
+            initializer=_init_worker,
+            initargs=(config, tuple(preload)),
+        )
+
+    def _share(self, value, blocks):
+        if isinstance(value, np.ndarray) and value.nbytes >= SHM_MIN_BYTES:
+            value = np.ascontiguousarray(value)
+            shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+            np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+            blocks.append(shm)
+            return _SharedArray(shm.name, value.shape, value.dtype.str)
+        return value
+
+    def submit(self, name: str, method: str, *args, **kwargs) -> Future:
+        blocks = []
+        args = tuple(self._share(a, blocks) for a in args)
+        kwargs = {k: self._share(v, blocks) for k, v in kwargs.items()}
+        try:
+            future = self._executor.submit(_run_in_worker, name, method, args, kwargs)
+        except Exception:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+            raise
+
+        def release(_):
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+        future.add_done_callback(release)
+        return future
+
+    def model(self, name: str) -> "RemoteModel":
+        return RemoteAffectAnalyzer(self, name) if name == AFFECT else RemoteModel(self, name)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class RemoteModel:
+    """Stand-in for a model living in the pool: `model.transcribe(audio)` blocks on the worker's result,
+    `model.submit("transcribe", audio)` returns the future instead."""
+
+    def __init__(self, pool: ProcessModelPool, name: str):
+        self._pool = pool
+        self._name = name
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        return self._pool.submit(self._name, method, *args, **kwargs)
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def remote(*args, **kwargs):
+            return self.submit(method, *args, **kwargs).result()
+        return remote
+
+
+class RemoteAffectAnalyzer(RemoteModel):
+    """RemoteModel for the affect analyzer that records its span in this process.
+
+    Spans opened inside a worker land in that worker's tracer, which /metrics
+    and /traces never see. Sentiment and emotion run side by side in the
+    worker and can't be told apart from here, so the whole remote call is
+    one "affect_remote" span.
+    """
+
+    def analyze_batch(self, texts):
+        if not texts:
+            return []
+        with tracing.tracer.span("affect_remote"):
+            return self.submit("analyze_batch", texts).result()
+
+    def analyze(self, text):
+        return self.analyze_batch([text])[0]
@@ -0,0 +1,313 @@
+"""Replay WAV files through the live pipeline and report per-stage latency.
+
+    python replay.py                                  # data/harvard.wav in real time, stub LLM and TTS
+    python replay.py recordings/ --speed 4            # every WAV in a directory, 4x faster than real time
+    python replay.py data/harvard.wav --llm gemini --tts elevenlabs
+    python replay.py recordings/ --report new.json --baseline release.json   # exit 1 on a p95 regression
+    python replay.py --llm http --llm-slow-rate 0.2 --deadline-ms 800 --hedge-ms 400   # deadline/hedging offline
+
+Audio goes through the real VAD framing, speaker gate, Whisper, affect analysis
+and suggestion path. Only the LLM and TTS are swapped for local stubs (with
+configurable latency) unless asked otherwise. Nothing is played out loud.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+DEFAULT_AUDIO = os.path.join(os.path.dirname(__file__), "..", "..", "data", "harvard.wav")
+FEED_CHUNK_SECONDS = 0.1
+TAIL_SILENCE_SECONDS = 2.0  # lets the VAD close the last segment
+QUIET_SECONDS = 0.5         # how long the pipeline must stay idle before a file counts as done
+MAX_FEED_LAG_SECONDS = 2.0  # how far the feed may run ahead of the VAD loop before it waits
+
+STAGES = (
+    "speaker_embedding",
+    "transcription",
+    "affect",
+    "llm_first_chunk",
+    "llm_total",
+    "tts_synthesis",
+    "segment_processing",
+    "speech_end_to_transcript",
+    "speech_end_to_first_audio",
+)
+
+
+def _wav_paths(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "**", "*.wav"), recursive=True)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def _to_pcm16(audio: np.ndarray) -> np.ndarray:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class StageTimers:
+    def __init__(self):
+        from metrics import LatencyHistogram
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds * 1000)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - start)
+        return timed
+
+    def wrap_llm(self, generate_content):
+        def timed(prompt, stream: bool = False, **kwargs):
+            start = time.perf_counter()
+            if not stream:
+                try:
+                    return generate_content(prompt, **kwargs)
+                finally:
+                    self.observe("llm_total", time.perf_counter() - start)
+
+            def chunks():
+                first = True
+                for chunk in generate_content(prompt, stream=True, **kwargs):
+                    if first:
+                        self.observe("llm_first_chunk", time.perf_counter() - start)
+                        first = False
+                    yield chunk
+                self.observe("llm_total", time.perf_counter() - start)
+            return chunks()
+        return timed
+
+    def summary(self) -> dict:
+        report = {}
+        for name, hist in self.stages.items():
+            snap = hist.snapshot()
+            report[name] = {k: snap[k] for k in ("count", "p50_ms", "p95_ms", "p99_ms")}
+        return report
+
+
+class ReplaySink:
+    """TTS sink for one turn: synthesizes instead of playing and notes when the first audio is ready."""
+
+    def __init__(self, timers: StageTimers, turn: dict, speech_end):
+        self.timers = timers
+        self.turn = turn
+        self.speech_end = speech_end
+
+    def _synthesize(self, text: str, speed: float):
+        import text_to_speech
+        audio = self.timers.wrap("tts_synthesis", text_to_speech.synthesize)(text, speed)
+        if "first_audio_ms" not in self.turn and self.speech_end is not None:
+            latency = time.perf_counter() - self.speech_end
+            self.timers.observe("speech_end_to_first_audio", latency)
+            self.turn["first_audio_ms"] = round(latency * 1000, 1)
+        return audio
+
+    def speak(self, text: str, speed: float = 1.0):
+        self.turn["suggestion"] = text
+        return self._synthesize(text, speed)
+
+    def speak_stream(self, clauses, speed: float = 1.0) -> str:
+        spoken = []
+        for clause in clauses:
+            spoken.append(clause)
+            self._synthesize(clause, speed)
+        self.turn["suggestion"] = " ".join(spoken)
+        return self.turn["suggestion"]
+
+
+def _instrument(timers: StageTimers):
+    """Time every call into the shared models; the wrappers sit on the scheduler proxies."""
+    import model_manager
+    encoder = model_manager.get_encoder()
+    encoder.embed_utterance = timers.wrap("speaker_embedding", encoder.embed_utterance)
+    whisper = model_manager.get_whisper_model()
+    whisper.transcribe = timers.wrap("transcription", whisper.transcribe)
+    affect = model_manager.get_affect_analyzer()
+    affect.analyze = timers.wrap("affect", affect.analyze)
+    llm = model_manager.get_gemini_model()
+    llm.generate_content = timers.wrap_llm(llm.generate_content)
+
+
+def replay_file(path: str, speed: float, timers: StageTimers, calibration=None) -> dict:
+    import model_manager
+    import transcript_to_suggestions
+    from audio_frontend import load_wav
+    from live_audio_stream2 import AudioPipeline, CALIBRATION_SECONDS
+
+    audio = _to_pcm16(load_wav(path, SAMPLE_RATE))
+    turns = []
+    playbacks = []
+    busy = [0]
+    ctx = model_manager.ContextWindow()
+
+    def on_transcript(text, speaker):
+        speech_end = pipeline.last_speech_end
+        now = time.perf_counter()
+        if speech_end is not None:
+            timers.observe("speech_end_to_transcript", now - speech_end)
+        turn = {"speaker": speaker, "text": text.strip()}
+        turns.append(turn)
+        sink = ReplaySink(timers, turn, speech_end)
+        playbacks.append(transcript_to_suggestions.process_transcript_segment(ctx, text, speaker, tts=sink))
+
+    pipeline = AudioPipeline(on_transcript, name=f"replay-{os.path.basename(path)}")
+    process_segment = pipeline.process_segment
+
+    def timed_process_segment(*args, **kwargs):
+        busy[0] += 1
+        try:
+            return timers.wrap("segment_processing", process_segment)(*args, **kwargs)
+        finally:
+            busy[0] -= 1
+    pipeline.process_segment = timed_process_segment
+
+    if calibration is not None:
+        step = CALIBRATION_SECONDS * SAMPLE_RATE
+        pipeline.calibrate([calibration[i:i + step] for i in range(0, len(calibration) - step + 1, step)])
+
+    print(f"▶️ Replaying {path} ({len(audio) / SAMPLE_RATE:.1f}s at {speed or 'max'}x)")
+    pipeline.start()
+    audio = np.concatenate((audio, np.zeros(int(TAIL_SILENCE_SECONDS * SAMPLE_RATE), dtype=np.int16)))
+    chunk = int(FEED_CHUNK_SECONDS * SAMPLE_RATE)
+    start = time.perf_counter()
+    max_lag = int(MAX_FEED_LAG_SECONDS * SAMPLE_RATE)
+    for i in range(0, len(audio), chunk):
+        # Backpressure: faster than real time, the feed would lap the ring or pile segments up
+        # faster than Whisper clears them, and the queue would merge or drop whole turns
+        while pipeline.running and (pipeline.ring_lag > max_lag
+                                    or pipeline.segment_queue.depth() >= pipeline.segment_queue.maxsize):
+            time.sleep(0.005)
+        pipeline.feed(audio[i:i + chunk])
+        if speed:
+            delay = start + (i + chunk) / SAMPLE_RATE / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    quiet_since = None
+    while quiet_since is None or time.perf_counter() - quiet_since < QUIET_SECONDS:
+        if pipeline.segment_queue.depth() or busy[0]:
+            quiet_since = None
+        elif quiet_since is None:
+            quiet_since = time.perf_counter()
+        time.sleep(0.05)
+    for playback in list(playbacks):
+        try:
+            playback.result()
+        except Exception as e:
+            print(f"❌ Playback failed: {e}")
+    stats = pipeline.stats()
+    pipeline.stop()
+    return {"file": path, "seconds": round(len(audio) / SAMPLE_RATE, 2), "turns": turns, "pipeline": stats}
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for stage, stats in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before["p95_ms"] or not stats["count"]:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {before['p95_ms']:.0f}ms → {stats['p95_ms']:.0f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_AUDIO], help="WAV files or directories of them")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, 4 = four times faster, 0 = unpaced")
+    parser.add_argument("--llm", choices=("stub", "http", "gemini"), default="stub",
+                        help="http serves the stub LLM on a local port and calls it over the socket")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="fraction of stub LLM calls that are slow")
+    parser.add_argument("--llm-slow-ms", type=float, default=3000.0)
+    parser.add_argument("--deadline-ms", type=float, help="suggestion deadline (default: SUGGESTION_DEADLINE_MS)")
+    parser.add_argument("--hedge-ms", type=float, help="send a hedged LLM request after this long (0 = off)")
+    parser.add_argument("--tts", choices=("stub", "local", "elevenlabs"), default="stub")
+    parser.add_argument("--tts-latency-ms", type=float, default=150.0)
+    parser.add_argument("--calibrate", help="WAV of the user's own voice, so their speech is gated out")
+    parser.add_argument("--report", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95s against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    # model_manager reads these at import
+    os.environ["LLM_BACKEND"] = args.llm
+    os.environ["LLM_STUB_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["LLM_STUB_SLOW_RATE"] = str(args.llm_slow_rate)
+    os.environ["LLM_STUB_SLOW_MS"] = str(args.llm_slow_ms)
+    if args.deadline_ms is not None:
+        os.environ["SUGGESTION_DEADLINE_MS"] = str(args.deadline_ms)
+    if args.hedge_ms is not None:
+        os.environ["HEDGE_AFTER_MS"] = str(args.hedge_ms)
+    if args.llm == "http":
+        from llm_stub import StubLLM, serve
+        server = serve(StubLLM(args.llm_latency_ms, slow_rate=args.llm_slow_rate, slow_ms=args.llm_slow_ms), port=0)
+        os.environ["LLM_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["TTS_ENGINE"] = args.tts
+    os.environ["TTS_STUB_LATENCY_MS"] = str(args.tts_latency_ms)
+
+    import model_manager
+    import tracing
+    import transcript_to_suggestions
+    from audio_frontend import load_wav
+
+    model_manager.warm_up()
+    timers = StageTimers()
+    _instrument(timers)
+    calibration = _to_pcm16(load_wav(args.calibrate, SAMPLE_RATE)) if args.calibrate else None
+
+    files = []
+    for path in _wav_paths(args.inputs):
+        transcript_to_suggestions.suggestion_cache.clear()
+        files.append(replay_file(path, args.speed, timers, calibration))
+
+    report = {
+        "timestamp": time.time(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("report", "baseline")},
+        "stages": timers.summary(),
+        # The pipeline's own tracing spans, for cross-checking against the harness timers
+        "spans": {name: {k: snap[k] for k in ("count", "p50_ms", "p95_ms", "p99_ms")}
+                  for name, snap in tracing.tracer.snapshot()["stages"].items()},
+        "tts_engine": model_manager.get_tts_engine().stats(),
+        "suggestions": transcript_to_suggestions.suggestion_stats(),
+        "files": files,
+    }
+
+    print(f"\n{'stage':<28} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<28} {s['count']:>5} {s['p50_ms']:>6.0f}ms {s['p95_ms']:>6.0f}ms {s['p99_ms']:>6.0f}ms")
+    suggestions = report["suggestions"]
+    print(f"\nsuggestions: {suggestions['suggestions']}, LLM timeouts: {suggestions['timeout_rate']:.1%}, "
+          f"fallbacks: {suggestions['fallback_rate']:.1%}, hedges: {suggestions['llm_hedges']} "
+          f"({suggestions['llm_hedge_wins']} won)")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No p95 regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
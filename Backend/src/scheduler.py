@@ -0,0 +1,81 @@
+import threading
+from metrics import LatencyHistogram
+
+
+DEFAULT_CONCURRENCY = 1
+
+
+class ModelScheduler:
+    """Lets many sessions share one loaded copy of each model.
+
+    Every call to a shared model takes one of that model's slots, so sessions
+    queue for Whisper instead of all decoding at once and thrashing the CPU.
+    Wait time and queue depth per model are tracked so overload is visible.
+    """
+
+    def __init__(self, concurrency: dict = None):
+        self.concurrency = dict(concurrency or {})
+        self._slots = {}
+        self._waiting = {}
+        self._active = {}
+        self._wait_ms = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str):
+        with self._lock:
+            if name not in self._slots:
+                self._slots[name] = threading.BoundedSemaphore(self.concurrency.get(name, DEFAULT_CONCURRENCY))
+                self._waiting[name] = 0
+                self._active[name] = 0
+                self._wait_ms[name] = LatencyHistogram()
+        return self._slots[name]
+
+    def run(self, name: str, fn, *args, **kwargs):
+        slots = self._register(name)
+        with self._lock:
+            self._waiting[name] += 1
+        with self._wait_ms[name].time():
+            slots.acquire()
+        with self._lock:
+            self._waiting[name] -= 1
+            self._active[name] += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active[name] -= 1
+            slots.release()
+
+    def wrap(self, name: str, model):
+        """Proxy whose method calls go through `run(name, ...)`; other attributes pass through."""
+        self._register(name)
+        return ScheduledModel(self, name, model)
+
+    def stats(self) -> dict:
+        with self._lock:
+            names = list(self._slots)
+        return {
+            name: {
+                "concurrency": self.concurrency.get(name, DEFAULT_CONCURRENCY),
+                "waiting": self._waiting[name],
+                "active": self._active[name],
+                "wait": self._wait_ms[name].snapshot(),
+            }
+            for name in names
+        }
+
+
+class ScheduledModel:
+    def __init__(self, scheduler: ModelScheduler, name: str, model):
+        self._scheduler = scheduler
+        self._name = name
+        self.model = model
+
+    def __getattr__(self, attr):
+        value = getattr(self.model, attr)
+        if not callable(value):
+            return value
+
+        def scheduled(*args, **kwargs):
+            return self._scheduler.run(self._name, value, *args, **kwargs)
+        return scheduled
@@ -0,0 +1,226 @@
+import threading
+import time
+import uuid
+from typing import Optional
+import text_to_speech
+import transcript_to_suggestions
+from model_manager import ContextWindow
+from event_bus import EventBus
+from tracing import tracer
+from live_audio_stream2 import AudioPipeline, CALIBRATION_SEGMENTS, listen_and_run, record_calibration_samples
+
+
+DEFAULT_SESSION_ID = "default"
+TTS_SPEED = 1.3
+
+# Local microphone states
+IDLE = "idle"
+CALIBRATING = "calibrating"
+LISTENING = "listening"
+
+
+class Session:
+    """One conversation: its own context, voiceprint, audio pipeline and event streams.
+
+    Models are not per-session; the pipeline reaches them through the shared
+    scheduler in model_manager. The session is also the TTS sink passed to
+    process_transcript_segment, so everything it says lands in its own feed.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.created_at = time.time()
+        self.ctx = ContextWindow()
+        # Own LLM and playback workers, so sessions don't queue behind each other
+        self.workers = transcript_to_suggestions.SuggestionWorkers(session_id)
+        self.history = []
+        self.events = EventBus()
+        self.calibration_events = EventBus()
+        self.pipeline = AudioPipeline(self.handle_transcript, name=f"session-{session_id}")
+        self._calibration_step = 0
+        self.state = IDLE
+        self._state_lock = threading.Lock()
+        self._stop_requested = threading.Event()
+        # Remote clients take synthesized audio back instead of it playing on the server;
+        # one that didn't ask for audio gets text only, never the server's speakers
+        self.audio_sink = None
+        self.remote = False
+
+    @property
+    def is_listening(self) -> bool:
+        """True while calibrating or listening on the local mic, or while a remote stream feeds the pipeline."""
+        return self.state != IDLE or self.pipeline.running
+
+    def record(self, speaker: str, text: str, role: Optional[str] = None):
+        message = {"speaker": speaker, "text": text, "timestamp": time.time()}
+        if role:
+            message["role"] = role
+        self.history.append(message)
+        # The page expects a list of messages per event
+        self.events.publish([message])
+
+    def publish_calibration(self, step, message: str):
+        self.calibration_events.publish({"step": step, "message": message})
+
+    # ---- pipeline callbacks ----
+
+    def handle_transcript(self, text: str, speaker: str = "Other"):
+        try:
+            self.record(speaker, text, role="other")
+            transcript_to_suggestions.process_transcript_segment(self.ctx, text, speaker, tts=self, workers=self.workers)
+        except Exception as e:
+            print(f"[{self.id}] Error processing transcript: {e}")
+            self.record("System", f"Error processing transcript: {e}")
+
+    def speak(self, text: str, speed: float = TTS_SPEED):
+        try:
+            self.record("AI", text)
+            if self.audio_sink is not None:
+                audio = text_to_speech.synthesize(text, speed)
+                with tracer.span("playback"):
+                    self.audio_sink(audio)
+                return audio
+            if self.remote:
+                return None  # text-only client: the recorded message is what it gets
+            return text_to_speech.speak(text, speed, self.workers.player)
+        except Exception as e:
+            print(f"[{self.id}] Error generating speech: {e}")
+            self.record("System", f"Error generating speech: {e}")
+
+    def speak_stream(self, clauses, speed: float = TTS_SPEED):
+        # Streamed suggestions are recorded after playback, and only the clauses that actually played
+        try:
+            if self.audio_sink is not None:
+                spoken = []
+                for clause in clauses:
+                    spoken.append(clause)
+                    audio = text_to_speech.synthesize(clause, speed)
+                    with tracer.span("playback"):
+                        self.audio_sink(audio)
+                text = " ".join(spoken)
+            elif self.remote:
+                text = " ".join(clauses)  # text-only client: nothing to synthesize
+            else:
+                text = text_to_speech.speak_stream(clauses, speed, self.workers.player)
+            if text:  # empty when a newer turn superseded this one before it spoke
+                self.record("AI", text)
+            return text
+        except Exception as e:
+            print(f"[{self.id}] Error generating speech: {e}")
+            self.record("System", f"Error generating speech: {e}")
+
+    # ---- local microphone ----
+
+    def _calibration_prompt(self, _prompt: str) -> str:
+        self._calibration_step += 1
+        step = self._calibration_step
+        self.publish_calibration(step, f"Speak sample {step}/{CALIBRATION_SEGMENTS} now...")
+        time.sleep(1)  # Give UI time to update
+        return ""
+
+    def begin_local_listening(self):
+        """Claim the session for calibrate_and_listen; raises RuntimeError if it is already calibrating or listening."""
+        with self._state_lock:
+            if self.state != IDLE or self.pipeline.running:
+                raise RuntimeError(f"Session {self.id} is already {self.state if self.state != IDLE else LISTENING}")
+            self.state = CALIBRATING
+            self._stop_requested.clear()
+
+    def calibrate_and_listen(self):
+        """Calibrate from the server's microphone, then listen on it until stopped.
+
+        Call begin_local_listening first. A stop during calibration ends here
+        instead of starting the listener.
+        """
+        try:
+            self._calibration_step = 0
+            self.pipeline.calibrate(record_calibration_samples(self._calibration_prompt))
+            with self._state_lock:
+                if self._stop_requested.is_set():
+                    self.publish_calibration("stopped", "Calibration finished, but listening was stopped.")
+                    return
+                self.state = LISTENING
+            self.publish_calibration("completed", "Calibration complete. Now listening for conversations.")
+            listen_and_run(self.pipeline, stop_event=self._stop_requested)
+        except Exception as e:
+            print(f"[{self.id}] Error in calibrate_and_listen: {e}")
+        finally:
+            with self._state_lock:
+                self.state = IDLE
+
+    def stop(self):
+        # Set before stopping the pipeline so a listener that is just starting sees it either way
+        self._stop_requested.set()
+        self.pipeline.stop()
+        # Nothing queued for this conversation should be spoken after it ends
+        transcript_to_suggestions.turns_for(self.ctx).cancel()
+
+    def info(self) -> dict:
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "listening": self.is_listening,
+            "state": self.state,
+            "messages": len(self.history),
+        }
+
+
+class SessionManager:
+    """Registry of live sessions. Only one session at a time can own the local microphone."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.mic_owner: Optional[str] = None
+
+    def create(self, session_id: Optional[str] = None) -> Session:
+        with self._lock:
+            session_id = session_id or uuid.uuid4().hex[:12]
+            if session_id in self._sessions:
+                raise ValueError(f"Session {session_id} already exists")
+            session = self._sessions[session_id] = Session(session_id)
+            return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            if session_id not in self._sessions:
+                self._sessions[session_id] = Session(session_id)
+            return self._sessions[session_id]
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if self.mic_owner == session_id:
+                self.mic_owner = None
+        if session is None:
+            return False
+        session.stop()
+        session.workers.shutdown()
+        return True
+
+    def start_local_listening(self, session: Session):
+        """Calibrate and listen on the server microphone for `session` in a background thread."""
+        with self._lock:
+            if self.mic_owner not in (None, session.id):
+                raise RuntimeError(f"Microphone is in use by session {self.mic_owner}")
+            session.begin_local_listening()
+            self.mic_owner = session.id
+
+        def run():
+            try:
+                session.calibrate_and_listen()
+            finally:
+                with self._lock:
+                    if self.mic_owner == session.id:
+                        self.mic_owner = None
+
+        threading.Thread(target=run, name=f"mic-{session.id}", daemon=True).start()
+
+    def list(self):
+        return [session.info() for session in list(self._sessions.values())]
+
+
+sessions = SessionManager()
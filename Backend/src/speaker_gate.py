@@ -0,0 +1,128 @@
+import threading
+import numpy as np
+from tracing import tracer
+
+
+SAMPLE_RATE = 16000
+SELF_THRESHOLD = 0.75      # cosine similarity above which a segment is the user
+ADAPT_THRESHOLD = 0.85     # only confident self-matches move the voiceprint
+ADAPT_RATE = 0.05
+WINDOW_SECONDS = 1.6       # one Resemblyzer partial
+STEP_SECONDS = 0.5
+MIN_DECISION_WINDOWS = 2
+MIN_PARTIAL_COVERAGE = 0.9  # below this share of the segment, the partials' mean doesn't stand for all of it
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    return vec / (np.linalg.norm(vec) + 1e-8)
+
+
+class SpeakerGate:
+    """Holds the user's voiceprint and decides whether audio is self-speech.
+
+    The voiceprint starts from calibration and drifts slowly towards segments
+    that match it confidently, so it keeps up with mic placement and voice
+    changes over a long session. `get_encoder` is called on first use, so
+    building a gate doesn't wait for Resemblyzer to load.
+    """
+
+    def __init__(self, get_encoder, voiceprint: np.ndarray = None, threshold: float = SELF_THRESHOLD,
+                 sample_rate: int = SAMPLE_RATE):
+        self._get_encoder = get_encoder
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.voiceprint = None
+        self._lock = threading.Lock()
+        self.adaptations = 0
+        self.early_rejections = 0
+        if voiceprint is not None:
+            self.set_voiceprint(voiceprint)
+
+    @property
+    def encoder(self):
+        return self._get_encoder()
+
+    def set_voiceprint(self, voiceprint: np.ndarray):
+        with self._lock:
+            self.voiceprint = _unit(np.asarray(voiceprint, dtype=np.float32))
+            self.adaptations = 0
+
+    def similarity(self, embedding: np.ndarray) -> float:
+        if self.voiceprint is None:
+            return 0.0
+        return float(np.dot(self.voiceprint, _unit(embedding)))
+
+    def is_self(self, embedding: np.ndarray) -> bool:
+        return self.similarity(embedding) > self.threshold
+
+    def adapt(self, embedding: np.ndarray):
+        """Nudge the running voiceprint towards a confident self-match."""
+        if self.similarity(embedding) < ADAPT_THRESHOLD:
+            return
+        with self._lock:
+            self.voiceprint = _unit((1 - ADAPT_RATE) * self.voiceprint + ADAPT_RATE * _unit(embedding))
+            self.adaptations += 1
+
+    def embed(self, audio: np.ndarray) -> np.ndarray:
+        from resemblyzer import preprocess_wav
+        with tracer.span("embedding"):
+            return self.encoder.embed_utterance(preprocess_wav(audio, source_sr=self.sample_rate))
+
+    def embed_segment(self, segment) -> np.ndarray:
+        """Embed a whole audio_frontend.SpeechSegment from its cached encoder input."""
+        with tracer.span("embedding"):
+            return self.encoder.embed_utterance(segment.encoder_input)
+
+    def new_track(self) -> "SpeakerTrack":
+        return SpeakerTrack(self)
+
+
+class SpeakerTrack:
+    """Rolling partial embeddings for one in-progress segment.
+
+    `update` embeds each new WINDOW_SECONDS window as audio arrives and latches
+    a decision once MIN_DECISION_WINDOWS agree, so self-speech is rejected a
+    couple of seconds in rather than after the whole turn has been buffered.
+    """
+
+    def __init__(self, gate: SpeakerGate):
+        self.gate = gate
+        self.decision = None  # None until decided, then "self" or "other"
+        self._sum = None
+        self._count = 0
+        self._covered = 0  # samples from the segment start that the partials span
+        self._next_end = int(WINDOW_SECONDS * gate.sample_rate)
+
+    def _add(self, embedding: np.ndarray):
+        self._sum = embedding if self._sum is None else self._sum + embedding
+        self._count += 1
+
+    def update(self, audio: np.ndarray):
+        """Embed any complete windows in `audio` (float32, whole segment so far)."""
+        window = int(WINDOW_SECONDS * self.gate.sample_rate)
+        step = int(STEP_SECONDS * self.gate.sample_rate)
+        while self._next_end <= len(audio):
+            self._add(self.gate.embed(audio[self._next_end - window:self._next_end]))
+            self._covered = self._next_end
+            self._next_end += step
+
+        if self.decision is None and self._count >= MIN_DECISION_WINDOWS:
+            mean = self._sum / self._count
+            if self.gate.is_self(mean):
+                self.decision = "self"
+                self.gate.early_rejections += 1
+                self.gate.adapt(mean)
+            else:
+                self.decision = "other"
+        return self.decision
+
+    def embedding(self, segment) -> np.ndarray:
+        """Embedding of the whole SpeechSegment, for diarization and the final self-voice check.
+
+        Partials stop once the decision latches (about two seconds in), so their
+        mean is only reused when they span nearly all of the segment; otherwise
+        the segment is embedded whole.
+        """
+        if self._count == 0 or self._covered < MIN_PARTIAL_COVERAGE * len(segment.samples):
+            return self.gate.embed_segment(segment)
+        return _unit(self._sum / self._count)
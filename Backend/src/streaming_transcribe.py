@@ -0,0 +1,109 @@
+import re
+import threading
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+MAX_WINDOW_SECONDS = 20.0  # force-commit if the uncommitted tail grows past this
+MIN_DECODE_SECONDS = 0.3   # Whisper hallucinates on tiny slivers of audio
+PROMPT_WORDS = 30          # committed words fed back as context for the next window
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class IncrementalTranscript:
+    """Re-decodes a sliding window of one in-progress segment with Whisper.
+
+    Words that two consecutive hypotheses agree on are committed and the window
+    start moves past them, so each decode only covers the unstable tail. At the
+    VAD endpoint `finalize` only has to decode that short tail.
+
+    `get_model` is called on the first decode, on the thread doing the
+    decoding, so creating a transcript never waits for Whisper to load.
+    """
+
+    def __init__(self, get_model, sample_rate: int = SAMPLE_RATE):
+        self._get_model = get_model
+        self.sample_rate = sample_rate
+        self.committed = []
+        self.committed_until = 0  # samples into the segment
+        self._pending = []        # (word, start_sample, end_sample) from the last decode
+        self._lock = threading.Lock()
+        self._finalized = False
+        self.decodes = 0
+
+    @property
+    def model(self):
+        return self._get_model()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.committed).strip()
+
+    @property
+    def partial_text(self) -> str:
+        return (self.text + "".join(w for w, _, _ in self._pending)).strip()
+
+    def _decode(self, window: np.ndarray):
+        prompt = "".join(self.committed[-PROMPT_WORDS:]).strip() or None
+        result = self.model.transcribe(
+            window,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt,
+            temperature=0.0,
+            fp16=False,
+        )
+        self.decodes += 1
+        offset = self.committed_until
+        words = []
+        for segment in result.get("segments", []):
+            for w in segment.get("words", []):
+                words.append((
+                    w["word"],
+                    offset + int(w["start"] * self.sample_rate),
+                    offset + int(w["end"] * self.sample_rate),
+                ))
+        return words
+
+    def _commit(self, words):
+        for word, _, end in words:
+            self.committed.append(word)
+            self.committed_until = max(self.committed_until, end)
+
+    def update(self, audio: np.ndarray) -> str:
+        """Decode the uncommitted tail of `audio` (float32, whole segment so far)."""
+        with self._lock:
+            window = audio[self.committed_until:]
+            if self._finalized or len(window) < MIN_DECODE_SECONDS * self.sample_rate:
+                return self.partial_text
+
+            words = self._decode(window)
+
+            agreed = 0
+            for (prev, _, _), (cur, _, _) in zip(self._pending, words):
+                if _normalize(prev) != _normalize(cur):
+                    break
+                agreed += 1
+
+            if agreed == 0 and len(window) > MAX_WINDOW_SECONDS * self.sample_rate:
+                # Never agreed on anything; keep only the last couple of words unstable
+                agreed = max(0, len(words) - 2)
+
+            self._commit(words[:agreed])
+            self._pending = words[agreed:]
+            return self.partial_text
+
+    def finalize(self, audio: np.ndarray) -> str:
+        """Decode whatever is still uncommitted and return the full transcript."""
+        with self._lock:
+            window = audio[self.committed_until:]
+            if len(window) >= MIN_DECODE_SECONDS * self.sample_rate:
+                self._commit(self._decode(window))
+            else:
+                self._commit(self._pending)
+            self._pending = []
+            self._finalized = True
+            return self.text
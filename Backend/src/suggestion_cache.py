@@ -0,0 +1,146 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+
+MAX_ENTRIES = 256
+TTL_SECONDS = 600
+NEAR_DUPLICATE_THRESHOLD = 0.92  # cosine similarity of hashed trigram vectors; None disables the tier
+EMBEDDING_DIM = 512
+# Turns before the latest that are part of the key: enough to tell "Why?" after bad news from
+# "Why?" after good news, few enough that a repeated question still hits later in a conversation
+HISTORY_TURNS = 1
+_SUMMARY_PREFIX = "[earlier in the conversation]"
+
+_TIMESTAMP = re.compile(r"\s*@\s*\d{1,2}:\d{2}:\d{2}")
+_NON_WORD = re.compile(r"[^\w\s\[\]:]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_context(context_text: str) -> str:
+    """Strip what changes between otherwise identical contexts: block timestamps, case, punctuation, spacing."""
+    text = _TIMESTAMP.sub("", context_text.lower())
+    text = _NON_WORD.sub("", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def split_context(context_text: str, history_turns: int = HISTORY_TURNS):
+    """(recent history, latest turn) of a context, both normalized; the turn is the last line.
+
+    The history is only the `history_turns` lines before it; the rolling summary
+    and older turns are left out.
+    """
+    lines = [normalize_context(line) for line in context_text.strip().split("\n")]
+    lines = [line for line in lines if line and not line.startswith(_SUMMARY_PREFIX)]
+    if not lines:
+        return "", ""
+    history = lines[-1 - history_turns:-1] if history_turns > 0 else []
+    return "\n".join(history), lines[-1]
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Cheap unit-length embedding: character trigrams hashed into `dim` buckets."""
+    vec = np.zeros(dim, dtype=np.float32)
+    padded = f"  {text} "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode()) % dim] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SuggestionCache:
+    """LRU + TTL cache of suggestions keyed on the latest turn and the few turns before it.
+
+    Keying on the whole context would never hit in a live conversation, since
+    it grows with every turn. Exact matches are a dict lookup on the normalized
+    key. If `near_threshold` is set, a miss falls back to a cached entry with the
+    same recent history whose latest turn is the most similar by hashed-trigram
+    cosine similarity. Only the latest turn is compared: the history would swamp it.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS,
+                 near_threshold: Optional[float] = NEAR_DUPLICATE_THRESHOLD,
+                 history_turns: int = HISTORY_TURNS):
+        self.max_entries = max_entries
+        self.history_turns = history_turns
+        self.ttl_seconds = ttl_seconds
+        self.near_threshold = near_threshold
+        self._entries = OrderedDict()  # key -> (suggestion, stored_at, latest-turn embedding, history)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return now - stored_at > self.ttl_seconds
+
+    def _key(self, context_text: str):
+        history, latest = split_context(context_text, self.history_turns)
+        return f"{history}\n{latest}", history, latest
+
+    def _nearest(self, history: str, latest: str, now: float) -> Optional[str]:
+        query = embed_text(latest)
+        best_key, best_sim = None, self.near_threshold
+        for other, (_, stored_at, emb, other_history) in self._entries.items():
+            if other_history != history or self._expired(stored_at, now):
+                continue
+            sim = float(np.dot(query, emb))
+            if sim >= best_sim:
+                best_key, best_sim = other, sim
+        return best_key
+
+    def get(self, context_text: str) -> Optional[str]:
+        key, history, latest = self._key(context_text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is not None:
+                self.hits += 1
+            elif self.near_threshold is not None and self._entries:
+                near_key = self._nearest(history, latest, now)
+                if near_key is not None:
+                    key, entry = near_key, self._entries[near_key]
+                    self.near_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, context_text: str, suggestion: str):
+        key, history, latest = self._key(context_text)
+        emb = embed_text(latest) if self.near_threshold is not None else None
+        with self._lock:
+            self._entries[key] = (suggestion, time.time(), emb, history)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
@@ -1,54 +1,131 @@
-import io
-import os
-from model_manager import get_tts_model
-from elevenlabs import generate, save
+import queue
+import threading
+from model_manager import get_tts_engine
 import simpleaudio as sa
 from pydub import AudioSegment
+from tts_cache import PhraseAudioCache, phrase_key
+import tracing
+from tracing import tracer
 
 
+phrase_cache = PhraseAudioCache()
 
-def get_next_filename(prefix="output", ext="wav", folder="."):
-    """Find the next available numbered filename like output_1.wav, output_2.wav, etc."""
-    i = 1
-    while True:
-        filename = os.path.join(folder, f"{prefix}_{i}.{ext}")
-        if not os.path.exists(filename):
-            return filename
-        i += 1
-
-def play_wav(filepath: str):
-    """Play a WAV file using simpleaudio (cross-platform)."""
-    try:
-        wave_obj = sa.WaveObject.from_wave_file(filepath)
-        play_obj = wave_obj.play()
-        play_obj.wait_done()
-        print(f"[🔊 Played]: {filepath}")
-    except Exception as e:
-        print(f"❌ Could not play audio: {e}")
-
-def speak(text: str, speed: float = 1.0):
-    """Generate speech using ElevenLabs, adjust playback speed, and save to a WAV file."""
-    tts = get_tts_model()
-    output_path = get_next_filename()
-
-    # ElevenLabs returns MP3 bytes by default
-    audio_bytes = generate(
-        text=text,
-        voice=tts
-    )
-
-    # Convert MP3 bytes to AudioSegment
-    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+class Player:
+    """What one conversation is playing now, so its superseded suggestion can be cut off mid-sentence.
+
+    Stopping bumps `generation`; a stream started under an older generation
+    skips the rest of its audio. Other players keep going.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+        self.generation = 0
+
+    def play(self, audio: AudioSegment) -> bool:
+        """Play an AudioSegment straight from its PCM buffer; False if it was stopped or failed."""
+        generation = self.generation
+        try:
+            with tracer.span("playback"):
+                play_obj = sa.play_buffer(audio.raw_data, audio.channels, audio.sample_width, audio.frame_rate)
+                with self._lock:
+                    self._current = play_obj
+                play_obj.wait_done()
+            return self.generation == generation
+        except Exception as e:
+            print(f"❌ Could not play audio: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._current = None
+
+    def stop(self):
+        """Stop the audio playing now and skip the rest of the stream it belongs to."""
+        with self._lock:
+            self.generation += 1
+            if self._current is not None:
+                self._current.stop()
+
+
+# For callers without a session of their own, e.g. the local listener and replay
+default_player = Player()
+
+def play_segment(audio: AudioSegment, player: Player = None) -> bool:
+    return (player or default_player).play(audio)
+
+def stop_playback(player: Player = None):
+    (player or default_player).stop()
+
+def _render(text: str) -> AudioSegment:
+    """PCM audio for `text` from the configured engine, served from the phrase cache when possible."""
+    engine = get_tts_engine()
+    key = phrase_key(engine.cache_namespace, text)
+    audio = phrase_cache.get(key)
+    if audio is None:
+        audio = engine.synthesize(text)
+        phrase_cache.put(key, audio)
+    return audio
+
+def synthesize(text: str, speed: float = 1.0) -> AudioSegment:
+    """Generate speech with the configured TTS engine and adjust playback speed."""
+    with tracer.span("tts_synthesis"):
+        audio = _render(text)
+    if speed == 1.0:
+        return audio
 
     # Speed up playback using frame rate trick
-    faster_audio = audio._spawn(audio.raw_data, overrides={
+    return audio._spawn(audio.raw_data, overrides={
         "frame_rate": int(audio.frame_rate * speed)
     }).set_frame_rate(audio.frame_rate)
 
-    # Export to WAV
-    faster_audio.export(output_path, format="wav")
+def prerender(phrases, warm_engine: bool = True):
+    """Synthesize fixed phrases ahead of time so speaking them later needs no network round-trip."""
+    if warm_engine:
+        try:
+            get_tts_engine().warm_up()
+        except Exception as e:
+            print(f"⚠️ TTS warm-up failed: {e}")
+    for phrase in phrases:
+        try:
+            _render(phrase)
+        except Exception as e:
+            print(f"⚠️ Could not pre-render {phrase!r}: {e}")
+    print(f"[TTS] Pre-rendered {len(phrases)} phrases ({phrase_cache.stats()['bytes']} bytes cached)")
+
+def speak(text: str, speed: float = 1.0, player: Player = None):
+    """Generate speech with the configured TTS engine, adjust playback speed, and play it from memory."""
+    audio = synthesize(text, speed)
+    print(f"[TTS] Speaking: {text} (speed={speed}x)")
+    play_segment(audio, player)
+    return audio
+
+def speak_stream(clauses, speed: float = 1.0, player: Player = None) -> str:
+    """Synthesize clauses as they arrive and start playing as soon as the first one is ready.
+
+    Returns the text of the clauses that played to the end; a stop on
+    `player` cuts the rest.
+    """
+    player = player or default_player
+    audio_queue = queue.Queue(maxsize=4)
+    spoken = []
+
+    def synthesize_all():
+        try:
+            for clause in clauses:
+                audio_queue.put((clause, synthesize(clause, speed)))
+        except Exception as e:
+            print(f"❌ Streaming TTS failed: {e}")
+        finally:
+            audio_queue.put(None)
 
-    print(f"[TTS] Saved speech to: {output_path} (speed={speed}x)")
-    play_wav(output_path)
+    generation = player.generation
+    threading.Thread(target=tracing.bind(synthesize_all), daemon=True).start()
+    while (item := audio_queue.get()) is not None:
+        # Keep draining after a stop so the synthesis thread can finish
+        clause, audio = item
+        if player.generation == generation and player.play(audio):
+            spoken.append(clause)
 
-    return output_path
\ No newline at end of file
+    text = " ".join(spoken)
+    print(f"[TTS] Streamed speech: {text} (speed={speed}x)")
+    return text
@@ -0,0 +1,167 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from metrics import LatencyHistogram
+
+
+RECENT_SPANS = 1024
+TRACE_LOG = os.getenv("TRACE_LOG")  # append every span to this file as a JSON line
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+MAX_PROFILE_SECONDS = 60
+METRIC_PREFIX = "coverme"
+
+# Session and utterance tags for spans, carried across thread hops with `bind`
+_session = contextvars.ContextVar("trace_session", default=None)
+_utterance = contextvars.ContextVar("trace_utterance", default=None)
+
+
+@contextmanager
+def context(session: str = None, utterance: str = None):
+    """Tag every span opened inside this block (on this thread, or via `bind`) with a session/utterance."""
+    tokens = []
+    if session is not None:
+        tokens.append((_session, _session.set(session)))
+    if utterance is not None:
+        tokens.append((_utterance, _utterance.set(utterance)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def bind(fn):
+    """Wrap `fn` so it runs with the caller's tags when a pool or thread calls it later."""
+    ctx = contextvars.copy_context()
+
+    def bound(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return bound
+
+
+class Tracer:
+    """Timing spans per pipeline stage.
+
+    Each span lands in a per-stage LatencyHistogram (what /metrics exposes) and
+    in a ring of recent span records tagged with session and utterance.
+    """
+
+    def __init__(self, recent: int = RECENT_SPANS, log_path: str = TRACE_LOG):
+        self._stages = {}
+        self.counters = Counter()
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._log_path = log_path
+
+    def _histogram(self, stage: str) -> LatencyHistogram:
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(stage, LatencyHistogram())
+        return hist
+
+    def observe(self, stage: str, ms: float, error: bool = False, **tags):
+        self._histogram(stage).observe(ms)
+        record = {
+            "stage": stage,
+            "session": tags.get("session", _session.get()),
+            "utterance": tags.get("utterance", _utterance.get()),
+            "end": time.time(),
+            "ms": round(ms, 3),
+        }
+        if error:
+            record["error"] = True
+            self.count(f"{stage}_errors")
+        self._recent.append(record)
+        if self._log_path:
+            with self._lock, open(self._log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def span(self, stage: str, **tags):
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000, error, **tags)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def recent(self, session: str = None, utterance: str = None, limit: int = 200) -> list:
+        spans = [s for s in list(self._recent)
+                 if (session is None or s["session"] == session)
+                 and (utterance is None or s["utterance"] == utterance)]
+        return spans[-limit:]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = dict(self._stages)
+            counters = dict(self.counters)
+        return {"stages": {name: hist.snapshot() for name, hist in stages.items()}, "counters": counters}
+
+
+tracer = Tracer()
+
+
+# ==== PROMETHEUS TEXT FORMAT ====
+
+def _histogram_lines(name: str, label: str, snapshots: dict) -> list:
+    lines = [f"# TYPE {name} histogram"]
+    for value, snap in snapshots.items():
+        for le, n in snap["buckets"].items():
+            lines.append(f'{name}_bucket{{{label}="{value}",le="{le}"}} {n}')
+        lines.append(f'{name}_sum{{{label}="{value}"}} {snap["sum_ms"]}')
+        lines.append(f'{name}_count{{{label}="{value}"}} {snap["count"]}')
+    return lines
+
+
+def metrics_text(scheduler_stats: dict = None) -> str:
+    """Stage histograms, event counters and model queue state in Prometheus exposition format."""
+    snap = tracer.snapshot()
+    lines = _histogram_lines(f"{METRIC_PREFIX}_stage_duration_ms", "stage", snap["stages"])
+    lines.append(f"# TYPE {METRIC_PREFIX}_events_total counter")
+    for name, n in sorted(snap["counters"].items()):
+        lines.append(f'{METRIC_PREFIX}_events_total{{event="{name}"}} {n}')
+    if scheduler_stats:
+        lines += _histogram_lines(f"{METRIC_PREFIX}_model_queue_wait_ms", "model",
+                                  {name: s["wait"] for name, s in scheduler_stats.items()})
+        for gauge in ("waiting", "active", "concurrency"):
+            lines.append(f"# TYPE {METRIC_PREFIX}_model_{gauge} gauge")
+            for name, s in scheduler_stats.items():
+                lines.append(f'{METRIC_PREFIX}_model_{gauge}{{model="{name}"}} {s[gauge]}')
+    return "\n".join(lines) + "\n"
+
+
+# ==== SAMPLING PROFILER ====
+
+def sample_stacks(seconds: float = 5.0, hz: float = 100.0) -> str:
+    """Sample every thread's stack for `seconds` and return collapsed stacks ("a;b;c count"), flamegraph-ready."""
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(1 / hz)
+    return "\n".join(f"{stack} {n}" for stack, n in counts.most_common()) + "\n"
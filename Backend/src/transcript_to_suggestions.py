@@ -1,79 +1,103 @@
 import os
+import re
 import time
+import queue
+import threading
+import weakref
 from typing import List, Optional
-from model_manager import ContextWindow, get_gemini_model, get_sentiment_analyzer, get_emotion_analyzer
-from text_to_speech import speak
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from model_manager import ContextWindow, get_gemini_model, get_affect_analyzer
+import text_to_speech
 import model_manager
+import tracing
+from tracing import tracer
+from suggestion_cache import SuggestionCache
 
-# # --- Load API Key from .env ---
-# load_dotenv()
-# gemini_api_key = os.getenv("GEMINI_API_KEY")
+# The affect analyzer is fetched per call; model_manager loads it once, on first use or at warm-up
 
-# if not gemini_api_key:
-#     raise Exception("GEMINI_API_KEY not found in environment variables.")
+STAGE_WORKERS = 3  # per conversation: the LLM stream, a hedged request, and one spare
 
-# genai.configure(api_key=gemini_api_key)
 
-# # --- Sentiment & Emotion Analyzers ---
-sentiment_analyzer = get_sentiment_analyzer()
-emotion_analyzer = get_emotion_analyzer()
+class SuggestionWorkers:
+    """Thread pools one conversation's suggestions run on.
 
-# --- Context Manager Classes ---
+    Affect analysis and the Gemini call run side by side; playback has its own
+    single worker so suggestions are spoken in order without blocking the
+    caller. Each session gets its own set, so LLM concurrency grows with the
+    number of sessions and one session's playback never waits on another's,
+    nor gets cut off when another's turn is superseded.
+    """
 
-# class ContextBlock:
-#     def __init__(self, text: str, speaker: str = "unknown", timestamp: Optional[float] = None):
-#         self.text = text.strip()
-#         self.speaker = speaker
-#         self.timestamp = timestamp or time.time()
+    def __init__(self, name: str = "default", stage_workers: int = STAGE_WORKERS,
+                 player: text_to_speech.Player = None):
+        self.stage = ThreadPoolExecutor(max_workers=stage_workers, thread_name_prefix=f"stage-{name}")
+        self.playback = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"playback-{name}")
+        self.player = player or text_to_speech.Player()
+        self.playing = None  # the Turn whose audio the playback worker is on
 
-#     def __str__(self):
-#         return f"[{self.speaker} @ {time.strftime('%H:%M:%S', time.localtime(self.timestamp))}]: {self.text}"
+    def shutdown(self):
+        self.stage.shutdown(wait=False, cancel_futures=True)
+        self.playback.shutdown(wait=False, cancel_futures=True)
 
 
-# class ContextWindow:
-#     def __init__(self, max_blocks: int = 2):
-#         self.max_blocks = max_blocks
-#         self.blocks: List[ContextBlock] = []
+# Used by callers that don't pass their own, e.g. the local listener and replay
+default_workers = SuggestionWorkers(player=text_to_speech.default_player)
 
-#     def add(self, text: str, speaker: str = "User"):
-#         block = ContextBlock(text, speaker)
-#         self.blocks.append(block)
-#         if len(self.blocks) > self.max_blocks:
-#             self.blocks.pop(0)
+suggestion_cache = SuggestionCache()
 
-#     def get_context_as_text(self, separator: str = "\n") -> str:
-#         return separator.join(str(block) for block in self.blocks)
-
-#     def get_raw_text(self) -> str:
-#         return " ".join(block.text for block in self.blocks)
-
-#     def clear(self):
-#         self.blocks = []
+STREAM_SUGGESTIONS = True  # speak Gemini's answer clause by clause while it is still being generated
+# Advice that arrives after the moment has passed is worse than a generic line now: if Gemini hasn't
+# produced anything this long after the turn came in, the local suggestion is spoken instead
+SUGGESTION_DEADLINE_MS = float(os.getenv("SUGGESTION_DEADLINE_MS", "1500"))
+HEDGE_AFTER_MS = float(os.getenv("HEDGE_AFTER_MS", "0"))  # >0 sends a second request if the first is still silent by then
+# A turn from the same speaker this soon after one whose suggestion hasn't started playing replaces it with one request for both
+TURN_MERGE_SECONDS = float(os.getenv("TURN_MERGE_SECONDS", "3.0"))
+# A run of quick transcripts stops merging past these, so the prompt text stays bounded
+TURN_MAX_MERGES = int(os.getenv("TURN_MAX_MERGES", "3"))
+TURN_MAX_MERGED_CHARS = int(os.getenv("TURN_MAX_MERGED_CHARS", "600"))
+MIN_CLAUSE_WORDS = 3
+_CLAUSE_BOUNDARY = re.compile(r"[.!?;:,\u2014](?=\s)")
 
 # --- Emotion + Sentiment + Rule-Based Fallback ---
 
 def analyze_emotion(text: str):
-    sentiment = sentiment_analyzer(text)[0]
-    emotion = emotion_analyzer(text)[0][0]
-    return sentiment['label'], sentiment['score'], emotion['label'], emotion['score']
+    with tracer.span("affect"):
+        return get_affect_analyzer().analyze(text)
+
+def analyze_emotions(texts: List[str]):
+    """Batch version of analyze_emotion, e.g. for scoring a replayed conversation."""
+    return get_affect_analyzer().analyze_batch(texts)
+
+FALLBACK_RESPONSES = {
+    "anger": "Sounds like you're upset. Want to talk more about it?",
+    "disgust": "Sounds like you're upset. Want to talk more about it?",
+    "joy": "That's great to hear!",
+    "sadness": "I'm sorry you're feeling this way. I'm here if you want to talk.",
+    "surprise": "Wow, that sounds unexpected. What happened?",
+    "fear": "That sounds scary. Is there anything I can do to help?",
+}
+DEFAULT_FALLBACK = "Thanks for sharing. Can you tell me more?"
+
+QUESTION_FALLBACK = "They asked you something directly, so answer it briefly and then ask what they think."
 
 def fallback_response(emotion_label: str):
-    responses = {
-        "anger": "Sounds like you're upset. Want to talk more about it?",
-        "disgust": "Sounds like you're upset. Want to talk more about it?",
-        "joy": "That's great to hear!",
-        "sadness": "I'm sorry you're feeling this way. I'm here if you want to talk.",
-        "surprise": "Wow, that sounds unexpected. What happened?",
-        "fear": "That sounds scary. Is there anything I can do to help?",
-    }
-    return responses.get(emotion_label.lower(), "Thanks for sharing. Can you tell me more?")
+    return FALLBACK_RESPONSES.get(emotion_label.lower(), DEFAULT_FALLBACK)
+
+def local_suggestion(new_text: str, emotion_label: str):
+    """Instant suggestion without the LLM, for when Gemini fails or misses the deadline."""
+    if emotion_label.lower() not in FALLBACK_RESPONSES and new_text.rstrip().endswith("?"):
+        return QUESTION_FALLBACK
+    return fallback_response(emotion_label)
+
+def prerender_fallbacks():
+    """Have the fallback lines' audio ready before the first turn; model_manager's TTS warm-up calls this."""
+    text_to_speech.prerender(sorted(set(FALLBACK_RESPONSES.values()) | {DEFAULT_FALLBACK, QUESTION_FALLBACK}),
+                             warm_engine=False)
 
 # --- Gemini Suggestion Generator ---
 
-def generate_suggestion_with_gemini(context_text: str) -> str:
-    try:
-        model = get_gemini_model()
-        prompt = f"""You are a real-time conversation coach. Your job is to help the user reflect and think clearly during live, in-person conversations — especially when they’re unsure how to respond or carry the discussion forward.
+def _build_prompt(context_text: str) -> str:
+    return f"""You are a real-time conversation coach. Your job is to help the user reflect and think clearly during live, in-person conversations — especially when they’re unsure how to respond or carry the discussion forward.
 You do NOT give word-for-word responses.  
 You are NOT a chatbot pretending to talk for the user.
 You are NOT trying to make the user almost be like a therapist for the people they talk to.
@@ -94,46 +118,491 @@ Conversation:
 {context_text}
 
 Suggested Next Line:"""
-        response = model.generate_content(prompt)
-        return response.text.strip()
+
+
+def generate_suggestion_with_gemini(context_text: str) -> str:
+    cached = suggestion_cache.get(context_text)
+    if cached is not None:
+        return cached
+    try:
+        model = get_gemini_model()
+        prompt = _build_prompt(context_text)
+        with tracer.span("llm"):
+            response = model.generate_content(prompt)
+        suggestion = response.text.strip()
+        suggestion_cache.put(context_text, suggestion)
+        return suggestion
     except Exception as e:
         print(f"[Gemini Error]: {e}")
         return None
 
+def stream_suggestion_with_gemini(context_text: str):
+    """Yield the suggestion in pieces as Gemini generates it; yields nothing if the request fails."""
+    cached = suggestion_cache.get(context_text)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    start = time.perf_counter()
+    try:
+        model = get_gemini_model()
+        for chunk in model.generate_content(_build_prompt(context_text), stream=True):
+            if not parts:
+                tracer.observe("llm_first_token", (time.perf_counter() - start) * 1000)
+            parts.append(chunk.text)
+            yield chunk.text
+    except Exception as e:
+        print(f"[Gemini Error]: {e}")
+        tracer.observe("llm", (time.perf_counter() - start) * 1000, error=True)
+        return
+    tracer.observe("llm", (time.perf_counter() - start) * 1000)
+    suggestion = "".join(parts).strip()
+    if suggestion:
+        suggestion_cache.put(context_text, suggestion)
+
+
+def split_clauses(chunks, min_words: int = MIN_CLAUSE_WORDS):
+    """Regroup streamed text chunks into clauses that are worth sending to TTS on their own."""
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            for m in _CLAUSE_BOUNDARY.finditer(buf):
+                if len(buf[:m.end()].split()) >= min_words:
+                    yield buf[:m.end()].strip()
+                    buf = buf[m.end():]
+                    break
+            else:
+                break
+    if buf.strip():
+        yield buf.strip()
+
+
+class _SuggestionStream:
+    """Runs the Gemini stream on the stage pool so it overlaps affect analysis.
+
+    The first chunk must arrive within `deadline_ms` of the request starting to
+    run (time spent queued for a worker doesn't count), otherwise `clauses`
+    falls back to the local suggestion. With `hedge_ms` set, a second request
+    goes out if the first is still silent by then; whichever streams first is
+    spoken and the other is dropped at its next chunk.
+    """
+
+    def __init__(self, context_text: str, deadline_ms: float = SUGGESTION_DEADLINE_MS,
+                 hedge_ms: float = HEDGE_AFTER_MS, pool: ThreadPoolExecutor = None):
+        self._context_text = context_text
+        self._pool = pool or default_workers.stage
+        self._deadline_s = deadline_ms / 1000
+        self._hedge_s = hedge_ms / 1000
+        self._run_start = None
+        self._chunks = queue.Queue()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._winner = None
+        self._attempts = 0
+        self._pending = 0
+        self._finished = False
+        self._hedge_timer = None
+        self.timed_out = False
+        with self._lock:
+            self._start_attempt()
+
+    def _start_attempt(self):
+        # Called with self._lock held
+        self._attempts += 1
+        self._pending += 1
+        self._pool.submit(tracing.bind(self._produce), self._attempts)
+
+    def _start_clock(self):
+        """The first attempt has started running: the deadline and hedge delay count from now."""
+        with self._lock:
+            if self._run_start is not None:
+                return
+            self._run_start = time.perf_counter()
+            if self._hedge_s > 0 and not self._cancelled.is_set():
+                self._hedge_timer = threading.Timer(self._hedge_s, tracing.bind(self._hedge))
+                self._hedge_timer.daemon = True
+                self._hedge_timer.start()
+
+    def _time_left(self) -> Optional[float]:
+        """Seconds until the deadline, or None while the request is still queued."""
+        if self._run_start is None:
+            return None
+        return max(0.0, self._run_start + self._deadline_s - time.perf_counter())
+
+    def _hedge(self):
+        with self._lock:
+            if self._winner is not None or self._finished or self._cancelled.is_set():
+                return
+            tracer.count("llm_hedges")
+            self._start_attempt()
+
+    def _claim(self, attempt: int) -> bool:
+        """First attempt to produce a chunk wins the turn."""
+        with self._lock:
+            if self._winner is None:
+                self._winner = attempt
+                if attempt > 1:
+                    tracer.count("llm_hedge_wins")
+            return self._winner == attempt
+
+    def _produce(self, attempt: int):
+        self._start_clock()
+        try:
+            for chunk in stream_suggestion_with_gemini(self._context_text):
+                if self._cancelled.is_set() or not self._claim(attempt):
+                    return
+                self._chunks.put(chunk)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                # The winner ends the stream; if nobody won, the last attempt to fail does
+                last = self._winner == attempt or (self._winner is None and self._pending == 0)
+                if last and not self._finished:
+                    self._finished = True
+                    self._chunks.put(None)
+
+    def cancel(self):
+        self._cancelled.set()
+        with self._lock:
+            if self._hedge_timer is not None:
+                self._hedge_timer.cancel()
+            # Wake a consumer still waiting on the first chunk
+            if not self._finished:
+                self._finished = True
+                self._chunks.put(None)
+
+    def clauses(self, new_text: str, emotion: str):
+        """Clauses of the suggestion, or the local suggestion if Gemini failed or missed the deadline."""
+        def chunks():
+            started = False
+            while True:
+                # Only the first chunk is on the clock; once speaking, let the stream finish
+                time_left = None if started else self._time_left()
+                try:
+                    if started:
+                        chunk = self._chunks.get()
+                    else:
+                        # While the request is queued, check back once a deadline's worth has passed
+                        chunk = self._chunks.get(timeout=self._deadline_s if time_left is None else time_left)
+                except queue.Empty:
+                    if self._time_left() is None:
+                        continue
+                    self.timed_out = True
+                    self.cancel()
+                    tracer.count("llm_timeouts")
+                    return
+                if chunk is None:
+                    return
+                started = True
+                yield chunk
+
+        spoke = False
+        for clause in split_clauses(chunks()):
+            spoke = True
+            yield clause
+        if not spoke:
+            if self._cancelled.is_set() and not self.timed_out:
+                return  # superseded by a newer turn; nothing to say for this one
+            print(f"💬 Suggestion Source: Fallback (Gemini {'Timed Out' if self.timed_out else 'Failed'})")
+            tracer.count("fallbacks")
+            yield local_suggestion(new_text, emotion)
+
+
+class _SuggestionRequest:
+    """Non-streaming counterpart of _SuggestionStream: the first answer from up to two requests, or None at the deadline."""
+
+    def __init__(self, context_text: str, deadline_ms: float = SUGGESTION_DEADLINE_MS,
+                 hedge_ms: float = HEDGE_AFTER_MS, pool: ThreadPoolExecutor = None):
+        self._context_text = context_text
+        self._pool = pool or default_workers.stage
+        self._run_start = None
+        self._started = threading.Event()
+        self._deadline_ms = deadline_ms
+        self._hedge_ms = hedge_ms
+        self._cancelled = False
+        self.timed_out = False
+        self._futures = [self._submit()]
+
+    def _run(self):
+        # The deadline counts from when the first request starts running, not from when it was queued
+        if self._run_start is None:
+            self._run_start = time.perf_counter()
+            self._started.set()
+        return generate_suggestion_with_gemini(self._context_text)
+
+    def _submit(self):
+        return self._pool.submit(tracing.bind(self._run))
+
+    def cancel(self):
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
+
+    def result(self) -> Optional[str]:
+        hedged = self._hedge_ms <= 0
+        pending = set(self._futures)
+        while pending and not self._cancelled:
+            if not self._started.is_set():
+                # Still queued for a worker; the clock starts when it runs
+                self._started.wait(timeout=self._deadline_ms / 1000)
+                continue
+            now = time.perf_counter()
+            deadline = self._run_start + self._deadline_ms / 1000
+            hedge_at = None if hedged else self._run_start + self._hedge_ms / 1000
+            if hedge_at is not None and now >= hedge_at:
+                tracer.count("llm_hedges")
+                self._futures.append(self._submit())
+                pending.add(self._futures[-1])
+                hedged, hedge_at = True, None
+            if now >= deadline:
+                self.timed_out = True
+                self.cancel()
+                tracer.count("llm_timeouts")
+                return None
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=wake - now, return_when=FIRST_COMPLETED)
+            if self._cancelled:
+                break
+            for future in done:
+                # A concurrent cancel() leaves cancelled futures in `done`; they have no result
+                if future.cancelled() or future.exception() is not None or not future.result():
+                    continue
+                if future is not self._futures[0]:
+                    tracer.count("llm_hedge_wins")
+                return future.result()
+        return None
+
+
+# --- Turn Supersession ---
+
+class Turn:
+    """One transcript's trip through affect analysis, the LLM and TTS.
+
+    Cancelled when a newer turn in the same conversation starts; cancelling
+    runs the `on_cancel` hooks (the LLM request, current playback) and any
+    playback of this turn not yet started is dropped. Once its playback has
+    finished the turn is done and there is nothing left to cancel.
+    """
+
+    def __init__(self, text: str, speaker: str, merges: int = 0):
+        self.text = text
+        self.speaker = speaker
+        self.merges = merges
+        self.started = time.monotonic()
+        self.speaking = False
+        self._cancelled = threading.Event()
+        self._done = False
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def finish(self):
+        with self._lock:
+            self._done = True
+            self._hooks = []
+
+    def on_cancel(self, fn):
+        with self._lock:
+            if self._done:
+                return
+            if not self._cancelled.is_set():
+                self._hooks.append(fn)
+                return
+        fn()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set() or self._done:
+                return
+            self._cancelled.set()
+            hooks, self._hooks = self._hooks, []
+        for fn in hooks:
+            try:
+                fn()
+            except Exception as e:
+                print(f"⚠️ Could not cancel superseded turn: {e}")
+
+
+class TurnTracker:
+    """The latest turn of one conversation; starting a turn supersedes the previous one."""
+
+    def __init__(self, merge_seconds: float = TURN_MERGE_SECONDS, max_merges: int = TURN_MAX_MERGES,
+                 max_merged_chars: int = TURN_MAX_MERGED_CHARS):
+        self.merge_seconds = merge_seconds
+        self.max_merges = max_merges
+        self.max_merged_chars = max_merged_chars
+        self._current = None
+        self._lock = threading.Lock()
+
+    def begin(self, text: str, speaker: str) -> Turn:
+        """Start a turn for `text`, cancelling the previous one if it is still running.
+
+        If the previous turn came from the same speaker within `merge_seconds`
+        and none of its suggestion has been spoken, the new turn carries both
+        texts so one suggestion answers them together, up to `max_merges`
+        merges and `max_merged_chars` characters; past either, a fresh turn
+        starts with `text` alone.
+        """
+        with self._lock:
+            previous = self._current
+            if (previous is not None and not previous.speaking and not previous.done and previous.speaker == speaker
+                    and time.monotonic() - previous.started < self.merge_seconds):
+                merged = f"{previous.text} {text}"
+                if previous.merges < self.max_merges and len(merged) <= self.max_merged_chars:
+                    turn = Turn(merged, speaker, previous.merges + 1)
+                    tracer.count("merged_turns")
+                else:
+                    turn = Turn(text, speaker)
+                    tracer.count("merge_cap_reached")
+            else:
+                turn = Turn(text, speaker)
+            self._current = turn
+        if previous is not None and not previous.cancelled and not previous.done:
+            tracer.count("superseded_turns")
+            previous.cancel()
+        return turn
+
+    def cancel(self):
+        with self._lock:
+            turn, self._current = self._current, None
+        if turn is not None:
+            turn.cancel()
+
+
+_trackers = weakref.WeakKeyDictionary()
+_trackers_lock = threading.Lock()
+
+
+def turns_for(ctx: ContextWindow) -> TurnTracker:
+    """One tracker per conversation, keyed on its context window."""
+    with _trackers_lock:
+        tracker = _trackers.get(ctx)
+        if tracker is None:
+            tracker = _trackers[ctx] = TurnTracker()
+        return tracker
+
+
+def _stop_if_playing(turn: Turn, workers: SuggestionWorkers):
+    # Only interrupt audio that belongs to this turn, not a later one on the same worker
+    if workers.playing is turn:
+        workers.player.stop()
+
+
+def _until_cancelled(turn: Turn, clauses):
+    for clause in clauses:
+        if turn.cancelled:
+            return
+        turn.speaking = True
+        yield clause
+
+
+def _speak_turn(turn: Turn, workers: SuggestionWorkers, speak, payload):
+    """Playback job: speak `payload` unless the turn went stale while it sat in the queue."""
+    if turn.cancelled:
+        print(f"⏭️ Dropping stale suggestion for: {turn.text}")
+        tracer.count("stale_playbacks_dropped")
+        return None
+    if isinstance(payload, str):
+        turn.speaking = True
+    workers.playing = turn
+    try:
+        return speak(payload)
+    finally:
+        workers.playing = None
+        turn.finish()
+
+
+def suggestion_stats() -> dict:
+    """Turn counts and how often Gemini missed the deadline or was replaced by a fallback."""
+    counters = tracer.snapshot()["counters"]
+    stats = {name: counters.get(name, 0)
+             for name in ("suggestions", "llm_timeouts", "fallbacks", "llm_hedges", "llm_hedge_wins",
+                          "superseded_turns", "merged_turns", "stale_playbacks_dropped")}
+    turns = stats["suggestions"]
+    stats["timeout_rate"] = round(stats["llm_timeouts"] / turns, 4) if turns else 0.0
+    stats["fallback_rate"] = round(stats["fallbacks"] / turns, 4) if turns else 0.0
+    stats["deadline_ms"] = SUGGESTION_DEADLINE_MS
+    stats["hedge_after_ms"] = HEDGE_AFTER_MS
+    return stats
+
+
 # --- Master Processor ---
 
-def process_transcript_segment(ctx: ContextWindow, new_text: str):
-    ctx.add(new_text)
+def process_transcript_segment(ctx: ContextWindow, new_text: str, speaker: str = "User", tts=None,
+                               workers: SuggestionWorkers = None):
+    """Pick a suggestion for `new_text` and hand it to `tts` (anything with speak/speak_stream).
+
+    `tts` defaults to the text_to_speech module; sessions pass themselves so
+    suggestions land in their own feed, and their own `workers` so they don't
+    queue behind other sessions. A newer call with the same `ctx`
+    supersedes this one: its LLM request is cancelled and any of its speech
+    not yet played is dropped.
+    """
+    # Looked up at call time so wrappers installed on text_to_speech apply
+    tts = tts or text_to_speech
+    workers = workers or default_workers
+    turn = turns_for(ctx).begin(new_text, speaker)
+    if turn.text != new_text:
+        print("🔗 Merging with the previous turn, whose suggestion hadn't played yet")
+    ctx.add(new_text, speaker)
     context_text = ctx.get_context_as_text()
-    sentiment, sentiment_score, emotion, emotion_score = analyze_emotion(new_text)
+
+    # The LLM only needs the emotion for the anger/disgust short-circuit, so start both now
+    tracer.count("suggestions")
+    if STREAM_SUGGESTIONS:
+        suggestion = _SuggestionStream(context_text, pool=workers.stage)
+    else:
+        suggestion = _SuggestionRequest(context_text, pool=workers.stage)
+    turn.on_cancel(suggestion.cancel)
+    turn.on_cancel(lambda: _stop_if_playing(turn, workers))
+    sentiment, sentiment_score, emotion, emotion_score = analyze_emotion(turn.text)
+
+    print(f"\n[{speaker}] Text: {turn.text}")
+    print(f"🧠 Detected Sentiment: {sentiment} ({sentiment_score:.2f})")
+    print(f"🎭 Detected Emotion: {emotion} ({emotion_score:.2f})")
 
     # Fallback for negative emotions
     if emotion.lower() in ["anger", "disgust"]:
+        # Drop the Gemini request; if it is already in flight its answer is ignored
+        suggestion.cancel()
         response = fallback_response(emotion)
         source = "Fallback"
+        tracer.count("fallbacks")
+    elif STREAM_SUGGESTIONS:
+        # Playback starts on the first complete clause; the wrapper reports the full text
+        print("💬 Suggestion Source: Gemini (streaming)")
+        clauses = _until_cancelled(turn, suggestion.clauses(turn.text, emotion))
+        return workers.playback.submit(tracing.bind(_speak_turn), turn, workers, tts.speak_stream, clauses)
     else:
-        response = generate_suggestion_with_gemini(context_text)
+        response = suggestion.result()
         if response:
             source = "Gemini"
         else:
-            response = fallback_response(emotion)
-            source = "Fallback (Gemini Failed)"
+            response = local_suggestion(turn.text, emotion)
+            source = f"Fallback (Gemini {'Timed Out' if suggestion.timed_out else 'Failed'})"
+            tracer.count("fallbacks")
 
-    print(f"\nText: {new_text}")
-    print(f"🧠 Detected Sentiment: {sentiment} ({sentiment_score:.2f})")
-    print(f"🎭 Detected Emotion: {emotion} ({emotion_score:.2f})")
     print(f"💬 Suggestion Source: {source}")
     print(f"✅ Suggested Response: {response}")
-    speak(response)
-    
+    return workers.playback.submit(tracing.bind(_speak_turn), turn, workers, tts.speak, response)
+
 
 # --- Example Usage --
 
 if __name__ == "__main__":
     ctx = model_manager.ctx
 
-    # Simulate conversation
-    process_transcript_segment(ctx, "What is your previous work experience involving this software engineering position?")
-    process_transcript_segment(ctx, "Which companies did you work at specifically?")
-    process_transcript_segment(ctx, "What skills do you possess that make you qualified for this position?")
-    process_transcript_segment(ctx, "What do you expect your salary to be as a software engineer?")
+    # Simulate conversation; wait for each suggestion to play so the next question doesn't supersede it
+    for question in ("What is your previous work experience involving this software engineering position?",
+                     "Which companies did you work at specifically?",
+                     "What skills do you possess that make you qualified for this position?",
+                     "What do you expect your salary to be as a software engineer?"):
+        process_transcript_segment(ctx, question).result()
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from pydub import AudioSegment
+
+
+MAX_CACHE_BYTES = 32 * 1024 * 1024  # decoded PCM, roughly 12 minutes of 22 kHz mono speech
+
+
+def phrase_key(voice_id: str, text: str) -> str:
+    """Content address for a synthesized phrase: same voice and text, same audio."""
+    return hashlib.sha1(f"{voice_id}\x00{text.strip()}".encode("utf-8")).hexdigest()
+
+
+class PhraseAudioCache:
+    """Decoded TTS audio keyed by content hash, evicted LRU once over `max_bytes` of PCM."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> AudioSegment
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[AudioSegment]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: AudioSegment):
+        size = len(audio.raw_data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.raw_data)
+            self._entries[key] = audio
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.raw_data)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from pydub import AudioSegment
+from metrics import LatencyHistogram
+
+
+ELEVENLABS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+ELEVENLABS_MODEL = "eleven_monolingual_v1"
+PCM_RATE = 22050
+WARM_UP_TEXT = "Ready."
+
+
+class TTSEngine:
+    """Base class for speech backends.
+
+    Subclasses implement `_synthesize(text) -> AudioSegment`. Calls go through
+    `synthesize`, which caps concurrent requests per engine and records latency.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int = 2):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.latency = LatencyHistogram()
+        self.errors = 0
+
+    @property
+    def cache_namespace(self) -> str:
+        """Distinguishes cached audio between engines and voices."""
+        return self.name
+
+    def _synthesize(self, text: str) -> AudioSegment:
+        raise NotImplementedError
+
+    def synthesize(self, text: str) -> AudioSegment:
+        with self._slots, self.latency.time():
+            try:
+                return self._synthesize(text)
+            except Exception:
+                self.errors += 1
+                raise
+
+    def warm_up(self):
+        """Pay connection setup / model load before the first real utterance."""
+        self.synthesize(WARM_UP_TEXT)
+
+    def stats(self) -> dict:
+        return {
+            "engine": self.name,
+            "max_concurrency": self.max_concurrency,
+            "errors": self.errors,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class ElevenLabsEngine(TTSEngine):
+    """ElevenLabs REST API over one pooled keep-alive session, asking for raw PCM so there is no MP3 to decode."""
+
+    name = "elevenlabs"
+
+    def __init__(self, api_key: str, voice, model_id: str = ELEVENLABS_MODEL, max_concurrency: int = 2,
+                 timeout: float = 15.0):
+        super().__init__(max_concurrency)
+        self.voice = voice
+        self.model_id = model_id
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update({"xi-api-key": api_key, "Accept": "audio/pcm"})
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency))
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.name}:{self.voice.voice_id}"
+
+    def _synthesize(self, text: str) -> AudioSegment:
+        settings = self.voice.settings
+        response = self._session.post(
+            ELEVENLABS_URL.format(voice_id=self.voice.voice_id),
+            params={"output_format": f"pcm_{PCM_RATE}"},
+            json={
+                "text": text,
+                "model_id": self.model_id,
+                "voice_settings": {
+                    "stability": settings.stability,
+                    "similarity_boost": settings.similarity_boost,
+                },
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return AudioSegment(data=response.content, sample_width=2, frame_rate=PCM_RATE, channels=1)
+
+
+class LocalEngine(TTSEngine):
+    """Offline CPU synthesis through pyttsx3 (eSpeak / SAPI5 / NSSpeechSynthesizer)."""
+
+    name = "local"
+
+    def __init__(self, rate: int = 190, max_concurrency: int = 1):
+        import pyttsx3
+
+        super().__init__(max_concurrency)
+        self._engine = pyttsx3.init()
+        self._engine.setProperty("rate", rate)
+        # pyttsx3 drivers aren't thread-safe
+        self._engine_lock = threading.Lock()
+
+    def _synthesize(self, text: str) -> AudioSegment:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._engine_lock:
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+            return AudioSegment.from_file(path)
+        finally:
+            os.remove(path)
+
+
+class StubEngine(TTSEngine):
+    """Network-free stand-in: a soft tone sized to the text after a configurable delay.
+
+    Lets the playback path and benchmarks run without credentials or a speech model.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = 0.0, words_per_second: float = 3.0, sample_rate: int = 16000,
+                 max_concurrency: int = 8):
+        super().__init__(max_concurrency)
+        self.latency_ms = latency_ms
+        self.words_per_second = words_per_second
+        self.sample_rate = sample_rate
+
+    def _synthesize(self, text: str) -> AudioSegment:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        seconds = max(0.2, len(text.split()) / self.words_per_second)
+        t = np.arange(int(seconds * self.sample_rate)) / self.sample_rate
+        tone = (0.1 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+        return AudioSegment(data=tone.tobytes(), sample_width=2, frame_rate=self.sample_rate, channels=1)
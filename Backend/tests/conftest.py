@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Backend/src modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# model_manager refuses to import without API keys unless the local LLM and TTS stubs are selected
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("TTS_ENGINE", "stub")
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from audio_capture import AudioRingBuffer
+
+
+class _MidWriteArray(np.ndarray):
+    """Ring storage that runs `hook` right after the first slice of a write lands."""
+
+    hook = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        hook, self.hook = self.hook, None
+        if hook is not None:
+            hook()
+
+
+def test_read_across_the_wrap():
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(6))
+    ring.write(np.arange(6, 12))
+    assert ring.oldest_pos() == 4
+    assert ring.read(4, 12).tolist() == list(range(4, 12))
+    with pytest.raises(IndexError):
+        ring.read(2, 6)
+
+
+def test_read_during_a_lapping_write_is_rejected():
+    ring = AudioRingBuffer(8)
+    ring.write(np.ones(8))
+    ring._buf = ring._buf.view(_MidWriteArray)
+    seen = []
+
+    def read_oldest():
+        # The new samples are in the buffer but the write position hasn't moved yet
+        try:
+            seen.append(ring.read(0, 4))
+        except IndexError:
+            seen.append(None)
+
+    ring._buf.hook = read_oldest
+    ring.write(np.full(4, 2))
+    assert seen == [None]
+    assert ring.read(8, 12).tolist() == [2, 2, 2, 2]
@@ -0,0 +1,56 @@
+from model_manager import ContextBlock, ContextWindow, estimate_tokens, summarize_turns
+
+
+def _fill(ctx, n, words=8):
+    for i in range(n):
+        ctx.add(" ".join([f"turn{i}"] * words), speaker="Other")
+
+
+def test_stays_under_the_token_budget():
+    ctx = ContextWindow(max_tokens=60, summary_tokens=20)
+    _fill(ctx, 10)
+    assert ctx.tokens <= 60
+    assert ctx.evicted == 10 - len(ctx.blocks)
+    assert ctx.blocks[-1].text.startswith("turn9")
+
+
+def test_evicted_turns_are_folded_into_the_summary_line():
+    ctx = ContextWindow(max_blocks=2, summary_tokens=200)
+    _fill(ctx, 4, words=3)
+    lines = ctx.get_context_as_text().split("\n")
+    assert lines[0] == "[Earlier in the conversation]: Other: turn0 turn0 turn0 | Other: turn1 turn1 turn1"
+    assert [line.split("]: ")[1] for line in lines[1:]] == ["turn2 turn2 turn2", "turn3 turn3 turn3"]
+
+
+def test_without_a_summarizer_old_turns_are_dropped():
+    ctx = ContextWindow(max_blocks=2, summarizer=None)
+    _fill(ctx, 4)
+    assert ctx.summary == ""
+    assert len(ctx.get_context_as_text().split("\n")) == 2
+
+
+def test_a_single_turn_over_budget_is_kept():
+    ctx = ContextWindow(max_tokens=5)
+    ctx.add("this one turn is far longer than five tokens on its own")
+    assert len(ctx.blocks) == 1
+
+
+def test_context_text_is_rebuilt_after_a_change():
+    ctx = ContextWindow()
+    ctx.add("first")
+    before = ctx.get_context_as_text()
+    assert ctx.get_context_as_text() is before
+    ctx.add("second")
+    assert ctx.get_context_as_text().endswith("]: second")
+    ctx.clear()
+    assert ctx.get_context_as_text() == ""
+    assert ctx.tokens == 0
+
+
+def test_summary_keeps_the_gist_and_drops_its_oldest_entries():
+    long_turn = ContextBlock(" ".join(f"w{i}" for i in range(20)), "Other")
+    summary = summarize_turns("", [long_turn], max_tokens=100)
+    assert summary == "Other: " + " ".join(f"w{i}" for i in range(12)) + "..."
+
+    summary = summarize_turns("A: one | B: two", [ContextBlock("three", "C")], max_tokens=estimate_tokens("B: two | C: three"))
+    assert summary == "B: two | C: three"
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+import endpointing
+from endpointing import END, SPLIT, START, Endpointer
+
+FRAME = 480  # 30 ms at 16 kHz
+SPEECH, PAUSE, NOISE = 8000, 0, 330  # frame amplitudes; NOISE sits around -40 dBFS
+
+
+class EnergyVad:
+    """Stand-in for webrtcvad: loud frames are speech."""
+
+    def is_speech(self, data: bytes, sample_rate: int) -> bool:
+        return np.abs(np.frombuffer(data, dtype=np.int16)).mean() > 2000
+
+
+def _envelope(*runs):
+    """[(amplitude, frames), ...] -> one amplitude per frame."""
+    return [amplitude for amplitude, frames in runs for _ in range(frames)]
+
+
+def _push_all(endpointer, envelope):
+    events = []
+    for i, amplitude in enumerate(envelope):
+        events.extend(endpointer.push(np.full(FRAME, amplitude, dtype=np.int16), i * FRAME))
+    return events
+
+
+def test_segment_starts_with_pre_roll_and_ends_after_trail_pad():
+    endpointer = Endpointer(EnergyVad())
+    events = _push_all(endpointer, _envelope((PAUSE, 10), (SPEECH, 20), (PAUSE, 30)))
+
+    speech_start, speech_end = 10 * FRAME, 30 * FRAME
+    start = speech_start - 16000 * endpointing.PRE_ROLL_MS // 1000
+    end = speech_end + 16000 * endpointing.TRAIL_PAD_MS // 1000
+    # The segment is cut TRAIL_PAD_MS after the last speech, not at the end of the hangover
+    assert events == [(START, start), (END, start, end, speech_end)]
+
+
+def test_end_waits_for_the_hangover():
+    endpointer = Endpointer(EnergyVad())
+    hangover_frames = int(np.ceil(endpointing.INITIAL_HANGOVER_MS / 30))
+    events = _push_all(endpointer, _envelope((SPEECH, 10), (PAUSE, hangover_frames - 1)))
+    assert [e[0] for e in events] == [START]
+    assert [e[0] for e in endpointer.push(np.zeros(FRAME, dtype=np.int16), (9 + hangover_frames) * FRAME)] == [END]
+
+
+def test_pre_roll_never_reaches_before_the_floor():
+    endpointer = Endpointer(EnergyVad())
+    endpointer.reset(floor_pos=1000)
+    events = _push_all(endpointer, _envelope((PAUSE, 3), (SPEECH, 5)))
+    assert events == [(START, 1000)]
+
+
+def test_hangover_adapts_to_the_speakers_pauses():
+    endpointer = Endpointer(EnergyVad())
+    assert endpointer.hangover_ms == endpointing.INITIAL_HANGOVER_MS
+    _push_all(endpointer, _envelope((SPEECH, 10), (PAUSE, 8), (SPEECH, 10), (PAUSE, 8), (SPEECH, 10)))
+    # Two 240 ms mid-turn pauses: wait PAUSE_FACTOR times that before ending the turn
+    assert endpointer.pause_ms == pytest.approx(240)
+    assert endpointer.hangover_ms == pytest.approx(endpointing.PAUSE_FACTOR * 240)
+
+
+def test_hangover_grows_in_a_noisy_room():
+    endpointer = Endpointer(EnergyVad())
+    _push_all(endpointer, _envelope((NOISE, 20)))
+    assert endpointer.noise_floor_db > endpointing.NOISY_FLOOR_DBFS
+    assert endpointer.hangover_ms == endpointing.INITIAL_HANGOVER_MS + endpointing.NOISE_HANGOVER_MS
+
+
+def test_frames_near_the_noise_floor_skip_the_vad():
+    endpointer = Endpointer(EnergyVad())
+    _push_all(endpointer, _envelope((NOISE, 10), (SPEECH, 1)))
+    # The first noise frame sets the floor; the rest are within ENERGY_GATE_DB of it
+    assert endpointer.vad_calls == 2
+    assert endpointer.gated_frames == 9
+
+
+def test_long_turn_splits_at_its_pause():
+    endpointer = Endpointer(EnergyVad(), max_segment_seconds=3)
+    events = _push_all(endpointer, _envelope((PAUSE, 10), (SPEECH, 60), (PAUSE, 5), (SPEECH, 40)))
+
+    start = 10 * FRAME - 16000 * endpointing.PRE_ROLL_MS // 1000
+    split = (70 * FRAME + 75 * FRAME) // 2  # middle of the 150 ms pause
+    assert events[0] == (START, start)
+    assert events[1] == (SPLIT, start, split, split)
+    assert len(events) == 2
+    assert endpointer.start == split
+
+
+def test_long_turn_without_a_pause_splits_at_the_cap():
+    endpointer = Endpointer(EnergyVad(), max_segment_seconds=3)
+    events = _push_all(endpointer, _envelope((SPEECH, 101)))
+
+    cap = 3 * 16000
+    assert events == [(START, 0), (SPLIT, 0, 100 * FRAME, 100 * FRAME)]
+    assert 100 * FRAME >= cap > 99 * FRAME
+    assert endpointer.splits == 1
@@ -0,0 +1,39 @@
+from event_bus import EventBus
+
+
+def test_resumes_after_last_event_id():
+    bus = EventBus()
+    for n in range(3):
+        bus.publish({"n": n})
+    events = bus.listen("1", heartbeat=0.01)
+    assert [next(events)[1]["n"] for _ in range(2)] == [1, 2]
+
+
+def test_stale_last_event_id_from_earlier_process_replays_buffer():
+    bus = EventBus()
+    bus.publish({"n": 0})
+    bus.publish({"n": 1})
+    events = bus.listen("50", replay=True, heartbeat=0.01)
+    assert [next(events)[1]["n"] for _ in range(2)] == [0, 1]
+    bus.publish({"n": 2})
+    assert next(events)[1]["n"] == 2
+
+
+def test_stale_last_event_id_without_replay_starts_from_now():
+    bus = EventBus()
+    bus.publish({"n": 0})
+    events = bus.listen("50", replay=False, heartbeat=0.01)
+    assert next(events) is None  # keep-alive: nothing new yet
+    bus.publish({"n": 1})
+    assert next(events)[1]["n"] == 1
+
+
+def test_listener_receives_publishes_until_removed():
+    bus = EventBus()
+    received = []
+    bus.add_listener(received.append)
+    bus.publish({"n": 0})
+    bus.remove_listener(received.append)
+    bus.publish({"n": 1})
+    assert [event[1]["n"] for event in received] == [0]
+    assert bus.subscribers == 0
@@ -0,0 +1,92 @@
+import numpy as np
+from streaming_transcribe import IncrementalTranscript
+
+SR = 16000
+
+
+class ScriptedWhisper:
+    """Stand-in for Whisper: each transcribe() returns the next hypothesis, a list of (word, start_s, end_s)."""
+
+    def __init__(self, *hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.calls = []
+
+    def transcribe(self, window, **kwargs):
+        self.calls.append((len(window), kwargs.get("initial_prompt")))
+        words = [{"word": w, "start": s, "end": e} for w, s, e in self.hypotheses.pop(0)]
+        return {"segments": [{"words": words}]}
+
+
+def _audio(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def test_first_hypothesis_stays_pending():
+    model = ScriptedWhisper([(" hello", 0.0, 0.4), (" there", 0.5, 0.9)])
+    transcript = IncrementalTranscript(lambda: model, SR)
+    assert transcript.update(_audio(1.0)) == "hello there"
+    assert transcript.text == ""
+    assert transcript.committed_until == 0
+
+
+def test_words_two_hypotheses_agree_on_are_committed():
+    model = ScriptedWhisper(
+        [(" hello", 0.0, 0.4), (" there", 0.5, 0.9), (" friend", 1.0, 1.3)],
+        [(" Hello,", 0.0, 0.4), (" there", 0.5, 0.9), (" fiend", 1.0, 1.3), (" how", 1.4, 1.6)],
+    )
+    transcript = IncrementalTranscript(lambda: model, SR)
+    transcript.update(_audio(1.4))
+    assert transcript.update(_audio(1.8)) == "Hello, there fiend how"
+    # Case and punctuation don't break agreement; the first disagreement ends it
+    assert transcript.text == "Hello, there"
+    assert transcript.committed_until == int(0.9 * SR)
+
+
+def test_next_decode_covers_only_the_uncommitted_tail():
+    model = ScriptedWhisper(
+        [(" hello", 0.0, 0.4), (" there", 0.5, 0.9)],
+        [(" hello", 0.0, 0.4), (" there", 0.5, 0.9), (" how", 1.0, 1.2)],
+        [(" how", 0.1, 0.3), (" are", 0.4, 0.6)],
+    )
+    transcript = IncrementalTranscript(lambda: model, SR)
+    transcript.update(_audio(1.0))
+    transcript.update(_audio(1.3))
+    transcript.update(_audio(2.0))
+    assert model.calls[2] == (int(2.0 * SR) - int(0.9 * SR), "hello there")
+    # "how" agreed again; word times in the tail are offset by where it starts
+    assert transcript.text == "hello there how"
+    assert transcript.committed_until == int(0.9 * SR) + int(0.3 * SR)
+
+
+def test_finalize_decodes_the_tail_once():
+    model = ScriptedWhisper(
+        [(" hello", 0.0, 0.4), (" there", 0.5, 0.9)],
+        [(" hello", 0.0, 0.4), (" there", 0.5, 0.9)],
+        [(" how", 0.0, 0.2), (" are", 0.3, 0.5), (" you", 0.6, 0.8)],
+    )
+    transcript = IncrementalTranscript(lambda: model, SR)
+    transcript.update(_audio(1.0))
+    transcript.update(_audio(1.0))
+    assert transcript.finalize(_audio(2.0)) == "hello there how are you"
+    assert len(model.calls) == 3
+    # Finalized: later updates don't decode again
+    transcript.update(_audio(3.0))
+    assert len(model.calls) == 3
+
+
+def test_short_tail_at_finalize_keeps_the_pending_words():
+    model = ScriptedWhisper([(" hello", 0.0, 0.4), (" there", 0.5, 0.9)])
+    transcript = IncrementalTranscript(lambda: model, SR)
+    transcript.update(_audio(1.0))
+    assert transcript.finalize(_audio(0.2)) == "hello there"
+    assert len(model.calls) == 1
+
+
+def test_model_is_fetched_on_first_decode():
+    fetched = []
+    model = ScriptedWhisper([(" hi", 0.0, 0.3)])
+    transcript = IncrementalTranscript(lambda: fetched.append(1) or model, SR)
+    transcript.update(_audio(0.1))  # too short to decode
+    assert fetched == []
+    transcript.update(_audio(1.0))
+    assert fetched == [1]
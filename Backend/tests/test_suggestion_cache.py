@@ -0,0 +1,53 @@
+from suggestion_cache import SuggestionCache
+
+HISTORY = [
+    "[Other @ 10:00:01]: Thanks for coming in today, it's good to meet you.",
+    "[Other @ 10:00:09]: Tell me a little about your background in software engineering.",
+    "[Other @ 10:00:20]: Which companies have you worked at so far, and what did you build there?",
+]
+
+
+def _context(*latest):
+    return "\n".join(HISTORY + list(latest))
+
+
+def test_exact_match_ignores_timestamps():
+    cache = SuggestionCache()
+    cache.put(_context("[Other @ 10:01:00]: What salary do you expect?"), "Give a range.")
+    assert cache.get(_context("[Other @ 10:05:00]: What salary do you expect?")) == "Give a range."
+
+
+def test_near_tier_rephrasing_with_same_history_hits():
+    cache = SuggestionCache()
+    cache.put(_context("[Other]: What salary do you expect for this role?"), "Give a range.")
+    assert cache.get(_context("[Other]: What salary do you expect for this role")) == "Give a range."
+
+
+def test_different_questions_with_shared_history_miss():
+    cache = SuggestionCache()
+    cache.put(_context("[Other]: What salary do you expect for this role?"), "Give a range.")
+    assert cache.get(_context("[Other]: What skills make you a good fit for the team?")) is None
+    assert cache.get(_context("[Other]: Why?")) is None
+    assert cache.get(_context("[Other]: Okay.")) is None
+    assert cache.stats()["near_hits"] == 0
+
+
+def test_same_latest_turn_with_different_history_misses():
+    cache = SuggestionCache()
+    cache.put("[Other]: We just lost the contract.\n[Other]: Why?", "Ask what happened.")
+    assert cache.get("[Other]: I got the job!\n[Other]: Why?") is None
+
+
+def test_repeated_question_hits_after_unrelated_earlier_turns():
+    cache = SuggestionCache()
+    cache.put(_context("[Other @ 10:01:00]: So, what salary do you expect?"), "Give a range.")
+    # Older turns have been folded into the summary and other topics came up in between
+    later = [
+        "[Earlier in the conversation]: Introductions and background.",
+        "[Other @ 10:02:10]: Let's talk about the team you'd join.",
+        "[Other @ 10:03:30]: We ship weekly and everyone is on call once a month.",
+        "[Other @ 10:05:00]: Which companies have you worked at so far, and what did you build there?",
+        "[Other @ 10:06:00]: So, what salary do you expect?",
+    ]
+    assert cache.get("\n".join(later)) == "Give a range."
+    assert cache.stats()["hits"] == 1
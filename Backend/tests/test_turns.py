@@ -0,0 +1,79 @@
+from tracing import tracer
+from transcript_to_suggestions import Turn, TurnTracker
+
+
+def _count(name):
+    return tracer.snapshot()["counters"].get(name, 0)
+
+
+def test_quick_turn_from_the_same_speaker_merges():
+    tracker = TurnTracker(merge_seconds=60)
+    first = tracker.begin("Tell me about yourself.", "Other")
+    second = tracker.begin("And your last job?", "Other")
+    assert second.text == "Tell me about yourself. And your last job?"
+    assert second.merges == 1
+    assert first.cancelled
+
+
+def test_no_merge_across_speakers_after_speaking_or_outside_the_window():
+    tracker = TurnTracker(merge_seconds=60)
+    tracker.begin("Hello.", "Other")
+    assert tracker.begin("Hi there.", "User").text == "Hi there."
+
+    speaking = tracker.begin("How are you?", "User")
+    speaking.speaking = True
+    assert tracker.begin("Fine thanks.", "User").text == "Fine thanks."
+
+    tracker = TurnTracker(merge_seconds=0)
+    tracker.begin("One.", "Other")
+    assert tracker.begin("Two.", "Other").text == "Two."
+
+
+def test_merging_stops_at_the_caps():
+    tracker = TurnTracker(merge_seconds=60, max_merges=2)
+    texts = [tracker.begin(f"q{i}", "Other").text for i in range(4)]
+    assert texts == ["q0", "q0 q1", "q0 q1 q2", "q3"]
+
+    tracker = TurnTracker(merge_seconds=60, max_merged_chars=10)
+    texts = [tracker.begin("abcd", "Other").text for _ in range(3)]
+    assert texts == ["abcd", "abcd abcd", "abcd"]
+
+
+def test_running_turn_is_superseded():
+    tracker = TurnTracker(merge_seconds=0)
+    before = _count("superseded_turns")
+    first = tracker.begin("One.", "Other")
+    cancelled = []
+    first.on_cancel(lambda: cancelled.append("llm"))
+    tracker.begin("Two.", "Other")
+    assert first.cancelled
+    assert cancelled == ["llm"]
+    assert _count("superseded_turns") == before + 1
+
+
+def test_finished_turns_are_not_superseded():
+    tracker = TurnTracker(merge_seconds=60)
+    before = _count("superseded_turns")
+    for i in range(3):
+        turn = tracker.begin(f"Question {i}?", "Other")
+        turn.speaking = True
+        turn.finish()
+    assert not turn.cancelled
+    assert _count("superseded_turns") == before
+    # A finished turn isn't merged into either
+    assert tracker.begin("Next?", "Other").text == "Next?"
+
+
+def test_hooks_after_cancel_run_at_once_and_after_finish_never():
+    turn = Turn("Hi.", "Other")
+    turn.cancel()
+    ran = []
+    turn.on_cancel(lambda: ran.append("late"))
+    assert ran == ["late"]
+
+    turn = Turn("Hi.", "Other")
+    turn.finish()
+    turn.on_cancel(lambda: ran.append("done"))
+    turn.cancel()
+    assert ran == ["late"]
+    assert not turn.cancelled
@@ -0,0 +1,107 @@
+"""Tokens/sec of CustomTransformer generation: full re-encode per token vs the key/value cache.
+
+    python -m inference.bench_generate                  # random weights, lengths up to max_len
+    python -m inference.bench_generate --long 1024      # cached decoding well past max_len (sliding window)
+    python -m inference.bench_generate --checkpoint model/checkpoints/transformer.pt --vocab-size 8000
+
+Re-encoding costs grow with the sequence, so its per-token time rises with
+length; the cached path's per-token time should stay roughly flat. Each run
+also checks the cached logits match a full causal forward pass.
+"""
+import argparse
+import time
+import torch
+from model.model_def import CustomTransformer
+
+
+def generate_full(model, prompt, n_tokens):
+    """The old loop: run forward() over the whole sequence for every new token."""
+    ids = prompt.clone()
+    step_s = []
+    for _ in range(n_tokens):
+        start = time.perf_counter()
+        next_id = model(ids)[0, -1].argmax()
+        step_s.append(time.perf_counter() - start)
+        ids = torch.cat((ids, next_id.view(1, 1)), dim=1)
+    return ids, step_s
+
+
+def generate_cached(model, prompt, n_tokens, keep=None):
+    """Prefill once, then decode one token per step; slides the window at max_len."""
+    keep = keep or model.max_len // 2
+    cache = model.new_cache()
+    window = prompt
+    logits = model.decode(window, cache)[0, -1]
+    ids = prompt.clone()
+    step_s = []
+    for _ in range(n_tokens):
+        start = time.perf_counter()
+        next_id = logits.argmax().view(1, 1)
+        ids = torch.cat((ids, next_id), dim=1)
+        if cache.length == model.max_len:
+            window = ids[:, -keep:]
+            cache.reset()
+            logits = model.decode(window, cache)[0, -1]
+        else:
+            logits = model.decode(next_id, cache)[0, -1]
+        step_s.append(time.perf_counter() - start)
+    return ids, step_s
+
+
+def _tokens_per_s(step_s):
+    return len(step_s) / sum(step_s) if step_s else 0.0
+
+
+def check_equivalence(model, prompt, n_tokens):
+    """Largest logit difference between cached decoding and a full causal forward pass."""
+    ids = torch.cat((prompt, torch.randint(0, model.fc_out.out_features, (1, n_tokens))), dim=1)
+    cache = model.new_cache()
+    cached = torch.cat([model.decode(ids[:, i:i + 1], cache) for i in range(ids.size(1))], dim=1)
+    return (cached - model(ids)).abs().max().item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vocab-size", type=int, default=8000)
+    parser.add_argument("--checkpoint", help="state_dict to load instead of random weights")
+    parser.add_argument("--prompt-tokens", type=int, default=8)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[16, 32, 64, 96, 120])
+    parser.add_argument("--long", type=int, default=0, help="also decode this many tokens with the cache alone")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    model = CustomTransformer(args.vocab_size)
+    if args.checkpoint:
+        model.load_state_dict(torch.load(args.checkpoint, map_location="cpu"))
+    model.eval()
+    prompt = torch.randint(0, args.vocab_size, (1, args.prompt_tokens))
+
+    with torch.no_grad():
+        diff = check_equivalence(model, prompt, model.max_len - args.prompt_tokens)
+        print(f"Max |cached - full| logit difference: {diff:.2e}" + ("  ✅" if diff < 1e-3 else "  ❌"))
+
+        # Warm up kernels and allocator so the first row isn't penalized
+        generate_full(model, prompt, 4)
+        generate_cached(model, prompt, 4)
+
+        print(f"\n{'tokens':>6} {'full tok/s':>11} {'cached tok/s':>13} {'speedup':>8} "
+              f"{'full last ms':>13} {'cached last ms':>15}")
+        for n in args.lengths:
+            n = min(n, model.max_len - args.prompt_tokens)
+            _, full = generate_full(model, prompt, n)
+            _, cached = generate_cached(model, prompt, n)
+            print(f"{n:>6} {_tokens_per_s(full):>11.1f} {_tokens_per_s(cached):>13.1f} "
+                  f"{_tokens_per_s(cached) / _tokens_per_s(full):>7.1f}x "
+                  f"{full[-1] * 1000:>13.2f} {cached[-1] * 1000:>15.2f}")
+
+        if args.long:
+            ids, cached = generate_cached(model, prompt, args.long)
+            print(f"\nCached, {args.long} tokens (max_len={model.max_len}, sliding): "
+                  f"{_tokens_per_s(cached):.1f} tok/s, {ids.size(1)} tokens total")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from collections import Counter
 MODEL_PATH = "model/checkpoints/transformer.pt"
 TOKENIZER_PATH = "tokenizer/custom_tokenizer.json"
 MAX_LEN = 128
+CONTEXT_KEEP = MAX_LEN // 2  # tokens re-encoded when generation reaches MAX_LEN
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 TOP_K = 50
 MAX_GEN_TOKENS = 30
@@ -22,32 +23,41 @@ model.load_state_dict(torch.load(MODEL_PATH, map_location=DEVICE))
 model.to(DEVICE)
 model.eval()
 
-def generate_reply(prompt):
-    input_ids = tokenizer.encode(prompt).ids[:MAX_LEN]
-    generated_ids = input_ids.copy()
-
-    input_tensor = torch.tensor([input_ids], dtype=torch.long).to(DEVICE)
+def _next_token(logits, generated_ids):
+    # Apply repetition penalty
+    for token_id in Counter(generated_ids):
+        logits[token_id] *= REPEAT_PENALTY
 
-    for _ in range(MAX_GEN_TOKENS):
-        with torch.no_grad():
-            logits = model(input_tensor)[0, -1, :]
+    probs = F.softmax(logits, dim=-1)
+    topk_probs, topk_indices = torch.topk(probs, k=TOP_K)
+    return topk_indices[torch.multinomial(topk_probs, 1).item()].item()
 
-        # Apply repetition penalty
-        for token_id in Counter(generated_ids):
-            logits[token_id] *= REPEAT_PENALTY
+def generate_reply(prompt):
+    input_ids = tokenizer.encode(prompt).ids
+    generated_ids = input_ids.copy()
+    sep_id = tokenizer.token_to_id("[SEP]")
 
-        probs = F.softmax(logits, dim=-1)
-        topk_probs, topk_indices = torch.topk(probs, k=TOP_K)
-        next_token_id = topk_indices[torch.multinomial(topk_probs, 1).item()].item()
+    # Keep the end of a long prompt: that is what the reply follows on from
+    window = input_ids[-MAX_LEN:]
+    cache = model.new_cache()
 
-        if next_token_id == tokenizer.token_to_id("[SEP]"):
-            break
+    with torch.no_grad():
+        # One pass over the prompt fills the key/value cache; after that each step runs one token
+        logits = model.decode(torch.tensor([window], dtype=torch.long).to(DEVICE), cache)[0, -1, :]
+        for _ in range(MAX_GEN_TOKENS):
+            next_token_id = _next_token(logits, generated_ids)
+            if next_token_id == sep_id:
+                break
 
-        generated_ids.append(next_token_id)
-        input_tensor = torch.cat([
-            input_tensor,
-            torch.tensor([[next_token_id]], dtype=torch.long).to(DEVICE)
-        ], dim=1)
+            generated_ids.append(next_token_id)
+            window.append(next_token_id)
+            if len(window) > MAX_LEN:
+                # Positions run out at MAX_LEN: slide the window and re-encode the most recent tokens
+                window = window[-CONTEXT_KEEP:]
+                cache.reset()
+                logits = model.decode(torch.tensor([window], dtype=torch.long).to(DEVICE), cache)[0, -1, :]
+            else:
+                logits = model.decode(torch.tensor([[next_token_id]], dtype=torch.long).to(DEVICE), cache)[0, -1, :]
 
     response = tokenizer.decode(generated_ids)
     return response.replace(prompt, "").strip()
@@ -1,9 +1,32 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+
+
+def causal_mask(seq_len, device=None):
+    """Float mask that stops each position attending to later ones (-inf above the diagonal)."""
+    return torch.triu(torch.full((seq_len, seq_len), float('-inf'), device=device), diagonal=1)
+
+
+class KVCache:
+    """Keys and values of every layer for the tokens decoded so far, preallocated to max_len."""
+
+    def __init__(self, n_layers, batch_size, n_heads, max_len, head_dim, device=None, dtype=None):
+        shape = (n_layers, batch_size, n_heads, max_len, head_dim)
+        self.keys = torch.zeros(shape, device=device, dtype=dtype)
+        self.values = torch.zeros(shape, device=device, dtype=dtype)
+        self.max_len = max_len
+        self.length = 0
+
+    def reset(self):
+        self.length = 0
+
 
 class CustomTransformer(nn.Module):
     def __init__(self, vocab_size, emb_size=256, n_heads=4, n_layers=4, max_len=128):
         super().__init__()
+        self.max_len = max_len
+        self.n_heads = n_heads
 
         self.token_emb = nn.Embedding(vocab_size, emb_size)
         self.pos_emb = nn.Parameter(torch.randn(1, max_len, emb_size))
@@ -22,6 +45,8 @@ class CustomTransformer(nn.Module):
     def forward(self, x):
         # x shape: (batch_size, seq_len)
         seq_len = x.size(1)
+        if seq_len > self.max_len:
+            raise ValueError(f"Sequence of {seq_len} tokens is longer than max_len={self.max_len}")
 
         # Embed tokens and add positional embeddings
         x = self.token_emb(x) + self.pos_emb[:, :seq_len]
@@ -29,9 +54,54 @@ class CustomTransformer(nn.Module):
         # Transformer expects (seq_len, batch_size, emb_size)
         x = x.transpose(0, 1)
 
-        # Run through transformer encoder
-        x = self.transformer(x)
+        # Run through transformer encoder; causal, so training sees exactly what decode() sees
+        x = self.transformer(x, mask=causal_mask(seq_len, x.device))
 
         # Transpose back and run through output layer
         x = x.transpose(0, 1)  # (batch_size, seq_len, emb_size)
         return self.fc_out(x)
+
+    # ---- incremental decoding ----
+
+    def new_cache(self, batch_size=1):
+        emb_size = self.pos_emb.size(-1)
+        return KVCache(len(self.transformer.layers), batch_size, self.n_heads, self.max_len,
+                       emb_size // self.n_heads, self.pos_emb.device, self.pos_emb.dtype)
+
+    def decode(self, x, cache):
+        """Logits for the new tokens `x` (batch_size, n), attending to everything already in `cache`.
+
+        Same result as forward() over the whole sequence, but only the new
+        tokens are computed; their keys and values are appended to `cache`.
+        Call under torch.no_grad() with the model in eval mode.
+        """
+        n = x.size(1)
+        start = cache.length
+        if start + n > cache.max_len:
+            raise ValueError(f"Cache holds {start} tokens; {n} more would exceed max_len={cache.max_len}")
+
+        h = self.token_emb(x) + self.pos_emb[:, start:start + n]
+        # New tokens see the whole cache and the new tokens before them
+        mask = torch.ones(n, start + n, dtype=torch.bool, device=x.device).tril(diagonal=start)
+        for i, layer in enumerate(self.transformer.layers):
+            h = self._decode_layer(layer, h, cache, i, mask)
+        cache.length = start + n
+        return self.fc_out(h)
+
+    def _decode_layer(self, layer, h, cache, i, mask):
+        # nn.TransformerEncoderLayer's post-norm forward, with attention over cached keys/values;
+        # reuses the layer's own weights so existing checkpoints load unchanged
+        attn = layer.self_attn
+        batch_size, n, emb_size = h.shape
+        head_dim = emb_size // attn.num_heads
+        q, k, v = F.linear(h, attn.in_proj_weight, attn.in_proj_bias).chunk(3, dim=-1)
+        q, k, v = (t.view(batch_size, n, attn.num_heads, head_dim).transpose(1, 2) for t in (q, k, v))
+
+        start, end = cache.length, cache.length + n
+        cache.keys[i, :, :, start:end] = k
+        cache.values[i, :, :, start:end] = v
+        out = F.scaled_dot_product_attention(q, cache.keys[i, :, :, :end], cache.values[i, :, :, :end], attn_mask=mask)
+        out = attn.out_proj(out.transpose(1, 2).reshape(batch_size, n, emb_size))
+
+        h = layer.norm1(h + out)
+        return layer.norm2(h + layer.linear2(layer.activation(layer.linear1(h))))
@@ -52,7 +52,7 @@ for epoch in range(EPOCHS):
     loop = tqdm(loader, desc=f"Epoch {epoch+1}")
     for batch in loop:
         inputs, targets = [b.to(DEVICE) for b in batch]
-        outputs = model(inputs)  # (batch, seq_len, vocab_size)
+        outputs = model(inputs)  # (batch, seq_len, vocab_size); causal, so position t only sees tokens up to t
 
         loss = loss_fn(outputs.view(-1, vocab_size), targets.view(-1))
         optimizer.zero_grad()